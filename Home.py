@@ -1,35 +1,38 @@
-import streamlit as st
-from PIL import Image
-
-st.set_page_config(
-    page_title="Home",
-    page_icon="📊"
-)
-
-#image_path = 'C:/Users/jonat/OneDrive/Documentos/repos/dashboards/'
-image = Image.open('cury.png')
-
-st.sidebar.image(image, width=350)
-
-st.sidebar.markdown('# Curry Company')
-st.sidebar.markdown('## Fastest Delivery in Town')
-st.sidebar.markdown("""---""")
-
-st.write('# Curry Company Growth Dashboard')
-
-st.markdown(
-    """
-    Growth Dashboard foi construído para acompanhar as métricas de crescimento dos Entregadores e Restaurantes.
-    ### Como utilizar esse Growth Dashboard?
-    - Visão Empresa:
-        - Visão Gerencial: Métricas gerais de comportamento.
-        - Visão Tática: Indicadores semanais de crescimento.
-        - Visão Geográfica: Insights de geolocalização.
-    - Visão Entregador:
-        - Acompanhamento dos indicadores semanais de crescimento.
-    - Visão Restaurante:
-        - Indicadores semanais de crescimento dos restaurantes
-    ### Ask for Help
-    - @Jou
-    """
+import streamlit as st
+
+from curry.assets import LOGO_WIDTH, logo
+from curry.warmup import start_warm_up
+
+st.set_page_config(
+    page_title="Home",
+    page_icon="📊"
+)
+
+# pré-calcula em segundo plano o estado padrão das páginas (uma vez por processo)
+start_warm_up()
+
+# logo decodificado e redimensionado uma vez por processo (ver curry.assets)
+st.sidebar.image(logo(), width=LOGO_WIDTH)
+
+st.sidebar.markdown('# Curry Company')
+st.sidebar.markdown('## Fastest Delivery in Town')
+st.sidebar.markdown("""---""")
+
+st.write('# Curry Company Growth Dashboard')
+
+st.markdown(
+    """
+    Growth Dashboard foi construído para acompanhar as métricas de crescimento dos Entregadores e Restaurantes.
+    ### Como utilizar esse Growth Dashboard?
+    - Visão Empresa:
+        - Visão Gerencial: Métricas gerais de comportamento.
+        - Visão Tática: Indicadores semanais de crescimento.
+        - Visão Geográfica: Insights de geolocalização.
+    - Visão Entregador:
+        - Acompanhamento dos indicadores semanais de crescimento.
+    - Visão Restaurante:
+        - Indicadores semanais de crescimento dos restaurantes
+    ### Ask for Help
+    - @Jou
+    """
 )
\ No newline at end of file
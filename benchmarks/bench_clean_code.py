@@ -0,0 +1,66 @@
+""" Benchmark do clean_code: versão original (linha a linha) vs. vetorizada
+
+    Uso (a partir da raiz do repositório):
+        python -m benchmarks.bench_clean_code --rows 10000000
+
+    O csv sintético é gerado uma vez em --csv e reaproveitado nas execuções seguintes.
+"""
+# bibliotecas
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_train_csv
+from curry.cleaning import clean_code
+
+def clean_code_legacy(df1):
+    # cópia do clean_code original das páginas, usada como referência
+    df1 = df1[df1['Delivery_person_Age'] != 'NaN ']
+    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
+    df1 = df1[df1['Road_traffic_density'] != 'NaN ']
+    df1 = df1[df1['City'] != 'NaN ']
+    df1 = df1[df1['Festival'] != 'NaN ']
+    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
+    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+    df1 = df1[df1['multiple_deliveries'] != 'NaN ']
+    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
+    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
+    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
+    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
+    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
+    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
+    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
+    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1]).astype(int)
+    return df1
+
+def timed(func, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--csv', default=None, help='caminho do csv sintético (padrão: /tmp/curry_train_<rows>.csv)')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    path = args.csv or '/tmp/curry_train_%d.csv' % args.rows
+    if not os.path.exists(path):
+        print('gerando %s ...' % path)
+        write_train_csv(path, args.rows)
+
+    df = pd.read_csv(path)
+    rows = len(df)
+
+    for name, func in [('antes (linha a linha)', clean_code_legacy), ('depois (vetorizado)', clean_code)]:
+        seconds = timed(func, df, args.repeat)
+        print('%-24s %8.2f s  %12.0f linhas/s' % (name, seconds, rows / seconds))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+""" Relatório de memória do dataframe limpo: esquema original vs. compacto
+
+    Cada variante roda em um processo separado, que lê o csv, limpa e guarda só
+    o dataframe limpo (como o processo do Streamlit). O relatório mostra os
+    bytes por coluna (memory_usage com deep=True) e a memória residente do
+    processo (RSS) antes e depois de carregar os dados.
+
+    Uso (a partir da raiz do repositório):
+        python -m benchmarks.bench_memory --rows 1000000
+"""
+# bibliotecas
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from benchmarks.bench_clean_code import clean_code_legacy
+from benchmarks.synthetic import write_train_csv
+from curry.cleaning import prepare
+from curry.geo import haversine_km
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def rss_bytes():
+    """ Memória residente atual do processo (Linux); None em outros sistemas """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+def load_variant(variant, path):
+    raw = pd.read_csv(path)
+    if variant == 'original':
+        # esquema das páginas antes da compactação: textos como object, int64 e float64
+        df1 = clean_code_legacy(raw)
+        df1['distance'] = haversine_km(df1['Restaurant_latitude'], df1['Restaurant_longitude'],
+                                       df1['Delivery_location_latitude'], df1['Delivery_location_longitude'])
+        return df1
+    return prepare(raw)
+
+def measure_variant(variant, path):
+    """ Executado no processo filho: carrega a variante e devolve as medidas """
+    gc.collect()
+    before = rss_bytes()
+    df1 = load_variant(variant, path)
+    gc.collect()
+    columns = df1.memory_usage(deep=True, index=False)
+    return {'rows': len(df1), 'rss_before': before, 'rss_after': rss_bytes(),
+            'columns': {col: int(n) for col, n in columns.items()}}
+
+def run_child(variant, path):
+    out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_memory', '--child', variant, '--csv', path],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+def mb(n):
+    return '%9.1f MB' % (n / 2 ** 20) if n is not None else '        - '
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--csv', default=None, help='caminho do csv (padrão: /tmp/curry_train_<rows>.csv sintético)')
+    parser.add_argument('--child', choices=['original', 'compacto'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    path = args.csv or '/tmp/curry_train_%d.csv' % args.rows
+    if args.child:
+        print(json.dumps(measure_variant(args.child, path)))
+        return
+
+    if not os.path.exists(path):
+        print('gerando %s ...' % path)
+        write_train_csv(path, args.rows)
+
+    original, compacto = run_child('original', path), run_child('compacto', path)
+
+    print('%-30s %12s %12s' % ('coluna', 'original', 'compacto'))
+    for col in original['columns']:
+        print('%-30s %12s %12s' % (col, mb(original['columns'][col]), mb(compacto['columns'].get(col))))
+    for name, key in [('total do dataframe', None), ('RSS antes', 'rss_before'), ('RSS depois', 'rss_after')]:
+        values = [sum(r['columns'].values()) if key is None else r[key] for r in (original, compacto)]
+        print('%-30s %12s %12s' % (name, mb(values[0]), mb(values[1])))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+""" Benchmark das funções de cálculo das páginas, fora do Streamlit
+
+    Gera datasets sintéticos no formato do train.csv (100k, 1M e 10M linhas por
+    padrão), roda cada função de cálculo das páginas (módulos curry.empresa,
+    curry.entregadores e curry.restaurantes) sobre o dataset inteiro e mede
+    tempo, pico de memória (tracemalloc) e linhas/s.
+
+    Uso (a partir da raiz do repositório):
+        python -m benchmarks.bench_pages --sizes 100000 1000000 --output atual.json
+        python -m benchmarks.bench_pages --sizes 100000 --compare atual.json
+
+    Com --compare, cada função é comparada com o JSON de referência e as que
+    ficaram mais lentas que --threshold são marcadas como regressão.
+"""
+# bibliotecas
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_train_csv
+from curry import empresa, entregadores, restaurantes
+from curry.cleaning import add_distance, clean_code, prepare
+from curry.cube import build_courier_cube, build_cube
+from curry.dateindex import DateIndex, DayTotals
+from curry.geo import haversine_km
+from curry.grid import GridIndex
+from curry.maps import cluster_map, map_html
+from curry.metrics import compute_metrics
+from curry.sketches import SketchIndex
+from curry.weekly import WeeklyRollup
+
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def build_cases(raw, df1, cube):
+    """ Lista de (nome, função sem argumentos, linhas de entrada) a medir """
+    rows = len(df1)
+    weekly = WeeklyRollup(df1)
+    sketches = SketchIndex(df1)
+    date_index = DateIndex(df1)
+    day_totals = DayTotals(cube)
+    couriers = build_courier_cube(df1)
+    grid = GridIndex(df1)
+    # consulta por raio a partir do restaurante com mais pedidos
+    lat, lon = (float(x) for x in grid.restaurants.iloc[0, :2])
+    delivery = df1[['Delivery_location_latitude', 'Delivery_location_longitude']].to_numpy(dtype=np.float64)
+    # data limite depois do último pedido: o filtro pega o dataset inteiro
+    end = df1['Order_Date'].max() + pd.Timedelta(days=1)
+
+    return [
+        ('clean_code', lambda: clean_code(raw), len(raw)),
+        ('distance (haversine)', lambda: add_distance(df1.drop(columns='distance')), rows),
+        ('build_cube', lambda: build_cube(df1), rows),
+        ('empresa.order_metric', lambda: empresa.order_metric(cube), rows),
+        ('empresa.traffic_order_share', lambda: empresa.traffic_order_share(cube), rows),
+        ('empresa.traffic_order_city', lambda: empresa.traffic_order_city(cube), rows),
+        ('date_index.select', lambda: date_index.select(df1, None, end, ['Jam']), rows),
+        ('day_totals', lambda: DayTotals(cube), rows),
+        ('day_totals.between', lambda: day_totals.between(None, end, ['Jam']), rows),
+        ('day_totals.mean_between', lambda: day_totals.mean_between('Time_taken(min)', None, end, ['Jam']), rows),
+        ('weekly_rollup', lambda: WeeklyRollup(df1), rows),
+        ('empresa.order_by_week', lambda: empresa.order_by_week(weekly.table(TRAFFIC)), rows),
+        ('empresa.order_share_by_week', lambda: empresa.order_share_by_week(weekly.table(TRAFFIC)), rows),
+        ('empresa.country_maps', lambda: map_html(empresa.country_maps(df1)), rows),
+        ('empresa.cluster_map', lambda: map_html(cluster_map(df1)), rows),
+        ('grid_index', lambda: GridIndex(df1), rows),
+        ('empresa.grid_map', lambda: empresa.grid_map(grid.cell_stats('entrega', None, end, TRAFFIC)), rows),
+        ('grid.within (10 km)', lambda: grid.within(lat, lon, 10), rows),
+        ('haversine completa (10 km)', lambda: haversine_km(lat, lon, delivery[:, 0], delivery[:, 1]) <= 10, rows),
+        ('courier_cube', lambda: build_courier_cube(df1), rows),
+        ('entregadores.overall_metrics', lambda: compute_metrics(couriers, entregadores.OVERALL_METRICS), rows),
+        ('entregadores.avg_ratings_per_deliver', lambda: entregadores.avg_ratings_per_deliver(couriers), rows),
+        ('entregadores.top_delivers', lambda: entregadores.top_delivers(couriers), rows),
+        ('restaurantes.overall_metrics', lambda: restaurantes.overall_metrics(cube), rows),
+        ('sketch_index', lambda: SketchIndex(df1), rows),
+        ('restaurantes.sketch_distribution', lambda: restaurantes.sketch_distribution(sketches, None, end, TRAFFIC), rows),
+        ('restaurantes.exact_distribution', lambda: restaurantes.exact_distribution(df1), rows),
+        ('restaurantes.distance', lambda: restaurantes.distance(cube), rows),
+        ('restaurantes.avg_std_time_graph', lambda: restaurantes.avg_std_time_graph(cube), rows),
+        ('restaurantes.avg_std_time_by_order_type', lambda: restaurantes.avg_std_time_by_order_type(cube), rows),
+        ('restaurantes.avg_std_time_on_traffic', lambda: restaurantes.avg_std_time_on_traffic(cube), rows),
+    ]
+
+def measure(func, repeat):
+    """ Melhor tempo em `repeat` execuções e pico de memória de uma execução extra """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    # o tracemalloc deixa a execução mais lenta: memória medida separada do tempo
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+def run_size(n_rows, data_dir, repeat, only=None):
+    path = os.path.join(data_dir, 'train_%d.csv' % n_rows)
+    if not os.path.exists(path):
+        print('gerando %s ...' % path, flush=True)
+        write_train_csv(path, n_rows)
+
+    raw = pd.read_csv(path)
+    df1 = prepare(raw)
+    cube = build_cube(df1)
+
+    results = {}
+    for name, func, rows in build_cases(raw, df1, cube):
+        if only and not any(o in name for o in only):
+            continue
+        seconds, peak = measure(func, repeat)
+        results[name] = {'seconds': seconds, 'peak_bytes': peak, 'rows_per_sec': rows / seconds if seconds else None}
+        print('%10d  %-45s %9.4f s  %9.1f MB  %14.0f linhas/s'
+              % (n_rows, name, seconds, peak / 2 ** 20, results[name]['rows_per_sec'] or 0), flush=True)
+    return results
+
+def compare(current, baseline, threshold):
+    """ Imprime a razão de tempo atual/referência e devolve a quantidade de regressões """
+    regressions = 0
+    for size, funcs in current['results'].items():
+        for name, result in funcs.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if not base:
+                continue
+            ratio = result['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+            flag = 'REGRESSÃO' if ratio > 1 + threshold else ''
+            regressions += bool(flag)
+            print('%10s  %-45s %6.2fx  %s' % (size, name, ratio, flag))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--data-dir', default='/tmp/curry_bench', help='onde os csv sintéticos são gerados/reaproveitados')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help='mede só as funções cujo nome contém um destes textos')
+    parser.add_argument('--output', help='grava os resultados em JSON')
+    parser.add_argument('--compare', help='JSON de referência para comparação')
+    parser.add_argument('--threshold', type=float, default=0.10, help='tolerância de regressão (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    current = {
+        'meta': {'date': datetime.datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                 'pandas': pd.__version__, 'numpy': np.__version__, 'machine': platform.machine()},
+        'results': {str(n): run_size(n, args.data_dir, args.repeat, args.only) for n in args.sizes},
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+""" Benchmark da inicialização das páginas: imports e primeira renderização
+
+    Cada página roda em um processo novo (como a primeira visita depois de
+    subir o Streamlit) e mede:
+      - imports: tempo dos imports da página (as linhas import/from do topo do
+        arquivo), depois do streamlit já importado;
+      - primeira execução: a página inteira pelo AppTest, incluindo a leitura
+        dos dados e os cálculos que não estão em cache;
+      - reexecução: a mesma página de novo no mesmo processo (cache quente).
+    Também mostra se o folium e o plotly.express foram importados só pelos
+    imports da página (o núcleo do plotly já vem com o streamlit).
+
+    Os processos rodam com CURRY_WARM_UP=0: a thread de warm-up (ver
+    curry.warmup) calcularia as três páginas durante a medida e a
+    reexecução mediria a disputa com ela, e não o cache quente.
+
+    Uso (a partir da raiz do repositório):
+        python -m benchmarks.bench_startup
+        python -m benchmarks.bench_startup --pages Home.py pages/2_visao_entregadores.py
+"""
+# bibliotecas
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+
+PAGES = ['Home.py', 'pages/1_visao_empresa.py', 'pages/2_visao_entregadores.py', 'pages/3_visao_restaurantes.py']
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def page_imports(page):
+    """ Código com as linhas de import do topo do arquivo da página """
+    with open(page) as f:
+        tree = ast.parse(f.read())
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return compile(ast.Module(body=nodes, type_ignores=[]), page, 'exec')
+
+def measure_page(page):
+    """ Executado no processo filho: mede imports, primeira execução e reexecução da página """
+    import streamlit  # noqa: F401  (fora da medida: o processo do Streamlit já tem ele importado)
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    exec(page_imports(page), {})
+    imports = time.perf_counter() - start
+    folium = 'folium' in sys.modules
+    plotly = 'plotly.express' in sys.modules
+
+    at = AppTest.from_file(page, default_timeout=600)
+    start = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - start
+    start = time.perf_counter()
+    at.run()
+    rerun = time.perf_counter() - start
+    return {'imports': imports, 'first_run': first_run, 'rerun': rerun, 'folium': folium, 'plotly': plotly,
+            'ok': not (at.exception or at.error)}
+
+def run_child(page):
+    out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child', page],
+                         check=True, capture_output=True, text=True,
+                         env=dict(os.environ, CURRY_WARM_UP='0')).stdout
+    return json.loads(out.splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', nargs='+', default=PAGES)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_page(args.child)))
+        return
+
+    print('%-32s %10s %14s %12s %8s %16s' % ('página', 'imports', '1ª execução', 'reexecução', 'folium',
+                                              'plotly.express'))
+    for page in args.pages:
+        r = run_child(page)
+        print('%-32s %8.3f s %12.3f s %10.3f s %8s %16s%s' % (page, r['imports'], r['first_run'], r['rerun'],
+                                                            'sim' if r['folium'] else 'não',
+                                                            'sim' if r['plotly'] else 'não',
+                                                            '' if r['ok'] else '  (erro)'))
+
+if __name__ == '__main__':
+    main()
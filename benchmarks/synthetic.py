@@ -0,0 +1,96 @@
+""" Geração de datasets sintéticos no mesmo formato do data/train.csv
+
+    Os valores seguem o formato bruto do dataset original: espaços no final
+    dos textos, 'NaN ' como valor ausente, 'conditions ' no clima e
+    '(min) ' na coluna de tempo.
+"""
+# bibliotecas
+import os
+
+import numpy as np
+import pandas as pd
+
+CITIES = ['Metropolitian ', 'Urban ', 'Semi-Urban ', 'NaN ']
+TRAFFIC = ['Low ', 'Medium ', 'High ', 'Jam ', 'NaN ']
+ORDERS = ['Snack ', 'Meal ', 'Drinks ', 'Buffet ']
+VEHICLES = ['motorcycle ', 'scooter ', 'electric_scooter ', 'bicycle ']
+WEATHER = ['conditions Sunny', 'conditions Stormy', 'conditions Sandstorms',
+           'conditions Cloudy', 'conditions Fog', 'conditions Windy', 'conditions NaN']
+
+# 22 cidades x 20 restaurantes x 3 entregadores, parecido com o dataset original
+N_REGIONS = 22
+N_RESTAURANTS = 20
+
+def make_orders(n_rows, seed=0, start_id=0):
+    """ Esta função gera um dataframe bruto (antes do clean_code) com n_rows pedidos
+
+        Input: quantidade de linhas, semente e primeiro ID
+        Output: Dataframe
+    """
+    rng = np.random.default_rng(seed)
+
+    region = rng.integers(0, N_REGIONS, n_rows)
+    restaurant = rng.integers(0, N_RESTAURANTS, n_rows)
+    courier = rng.integers(1, 4, n_rows)
+    region_names = np.array(['REG%02d' % r for r in range(N_REGIONS)], dtype=object)
+    courier_ids = region_names[region] + 'RES' + restaurant.astype(str).astype(object) + 'DEL0' + courier.astype(str).astype(object) + ' '
+
+    # coordenadas dos restaurantes fixas por (região, restaurante)
+    base_lat = rng.uniform(10, 30, (N_REGIONS, N_RESTAURANTS))
+    base_lon = rng.uniform(72, 88, (N_REGIONS, N_RESTAURANTS))
+    rest_lat = base_lat[region, restaurant]
+    rest_lon = base_lon[region, restaurant]
+
+    # ~4% dos entregadores sem idade/avaliação, como no original
+    missing = rng.random(n_rows) < 0.04
+    age = rng.integers(20, 40, n_rows).astype(str).astype(object)
+    age[missing] = 'NaN '
+    ratings = np.round(rng.uniform(2.5, 5.0, n_rows), 1).astype(str).astype(object)
+    ratings[missing] = 'NaN '
+
+    days = rng.integers(0, 113, n_rows)
+    dates = (pd.Timestamp('2022-02-11') + pd.to_timedelta(np.arange(113), unit='D')).strftime('%d-%m-%Y').to_numpy()
+
+    minutes = np.arange(10, 55)
+    time_taken = np.array(['(min) %d' % m for m in minutes], dtype=object)
+
+    def pick(values, p=None):
+        return np.array(values, dtype=object)[rng.choice(len(values), n_rows, p=p)]
+
+    return pd.DataFrame({
+        'ID': ['0x%x ' % i for i in range(start_id, start_id + n_rows)],
+        'Delivery_person_ID': courier_ids,
+        'Delivery_person_Age': age,
+        'Delivery_person_Ratings': ratings,
+        'Restaurant_latitude': rest_lat,
+        'Restaurant_longitude': rest_lon,
+        'Delivery_location_latitude': rest_lat + rng.uniform(-0.15, 0.15, n_rows),
+        'Delivery_location_longitude': rest_lon + rng.uniform(-0.15, 0.15, n_rows),
+        'Order_Date': dates[days],
+        'Time_Orderd': pick(['11:30:00', '19:45:00', '21:10:00', 'NaN ']),
+        'Time_Order_picked': pick(['11:45:00', '19:55:00', '21:25:00']),
+        'Weatherconditions': pick(WEATHER),
+        'Road_traffic_density': pick(TRAFFIC, [0.34, 0.24, 0.10, 0.31, 0.01]),
+        'Vehicle_condition': rng.integers(0, 4, n_rows),
+        'Type_of_order': pick(ORDERS),
+        'Type_of_vehicle': pick(VEHICLES, [0.58, 0.33, 0.08, 0.01]),
+        'multiple_deliveries': pick(['0', '1', '2', '3', 'NaN '], [0.31, 0.62, 0.04, 0.01, 0.02]),
+        'Festival': pick(['No ', 'Yes ', 'NaN '], [0.975, 0.02, 0.005]),
+        'City': pick(CITIES, [0.75, 0.22, 0.003, 0.027]),
+        'Time_taken(min)': time_taken[rng.integers(0, len(minutes), n_rows)],
+    })
+
+def write_train_csv(path, n_rows, chunk_rows=1_000_000, seed=0):
+    """ Esta função grava um train.csv sintético com n_rows linhas, em blocos
+
+        Input: caminho, quantidade de linhas, tamanho do bloco e semente
+        Output: caminho do arquivo gravado
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    written = 0
+    while written < n_rows:
+        size = min(chunk_rows, n_rows - written)
+        df = make_orders(size, seed=seed + written, start_id=written)
+        df.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += size
+    return path
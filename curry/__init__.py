@@ -0,0 +1 @@
+""" Camada compartilhada do dashboard da Curry Company (dados e cálculos). """
@@ -0,0 +1,35 @@
+""" Imagens estáticas do dashboard, carregadas uma vez por processo
+
+    O logo da barra lateral (cury.png, ~350 KB) é aberto, reduzido para a
+    largura em que é mostrado e codificado em PNG uma única vez; as páginas
+    recebem sempre os mesmos bytes, sem decodificar o arquivo a cada execução.
+"""
+# bibliotecas
+import io
+from functools import lru_cache
+
+from PIL import Image
+
+LOGO_PATH = 'cury.png'
+
+# largura do logo na barra lateral, em pixels
+LOGO_WIDTH = 350
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+@lru_cache(maxsize=4)
+def logo(path=LOGO_PATH, width=LOGO_WIDTH):
+    """ Esta função entrega o logo já redimensionado para a barra lateral
+
+        Input: caminho da imagem e largura em pixels
+        Output: bytes do PNG
+    """
+    with Image.open(path) as image:
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
@@ -0,0 +1,214 @@
+""" Processamento em lotes (out-of-core) para datasets maiores que a memória
+
+    O csv (ou o cache colunar, quando está em dia) é lido em lotes de tamanho
+    limitado. Cada lote passa pelo prepare, vira agregados mescláveis e é
+    descartado antes do próximo:
+      - cubo diário e cubo por entregador (ver curry.cube): quantidades, somas
+        e somas dos quadrados (médias e desvios), máximos e mínimos;
+      - agregado semanal (curry.weekly), sketches (curry.sketches) e cubos da
+        grade geográfica (curry.grid);
+      - uma amostra uniforme de SAMPLE_ROWS linhas para os mapas.
+
+    Os agregados dos lotes são juntados em árvore (ver MergeTree), e não um a
+    um no acumulado: o custo total cresce com lotes x log(lotes), e não com o
+    quadrado da quantidade de lotes.
+
+    A memória não cresce com as linhas de cada dia, mas também não é fixa:
+    além de um lote e das partes à espera na árvore, ela acompanha o tamanho
+    dos agregados, que cresce com o histórico:
+      - cubo diário, sketches e grade: dias x combinações das dimensões;
+      - cubo por entregador: dias x entregadores ativos em cada dia;
+      - agregado semanal: semanas x entregadores distintos de cada semana.
+
+    O curry.data usa esses agregados no lugar do dataframe inteiro quando o
+    csv passa de MAX_IN_MEMORY_BYTES (ver curry.data.out_of_core).
+
+    Uso (a partir da raiz do repositório):
+        python -m curry.chunked --csv data/train.csv
+"""
+# bibliotecas
+import argparse
+import itertools
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from curry.cleaning import prepare
+from curry.columnar import (CHUNK_BYTES, CHUNK_ROWS, cache_is_fresh, default_cache_dir, iter_cache, iter_csv_chunks,
+                            read_header)
+from curry.cube import build_courier_cube, build_cube, merge_courier_cubes, merge_cubes
+from curry.dateindex import sort_by_date
+from curry.grid import GridIndex
+from curry.profiling import stage
+from curry.sketches import SketchIndex
+from curry.weekly import WeeklyRollup
+
+# linhas guardadas na amostra (o mesmo limite de pontos dos mapas, ver curry.maps)
+SAMPLE_ROWS = 200_000
+
+# partes do mesmo nível juntadas de uma vez na árvore de merges (ver MergeTree)
+MERGE_FANOUT = 8
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def iter_clean_chunks(path, chunk_bytes=CHUNK_BYTES, chunk_rows=CHUNK_ROWS):
+    """ Esta função lê o dataset em lotes já limpos (saída do prepare)
+
+        Se o cache colunar estiver em dia, os lotes saem dele; senão, do csv.
+
+        Input: caminho do csv e tamanho dos lotes (bytes do csv / linhas do cache)
+        Output: gerador de Dataframes
+    """
+    if cache_is_fresh(path):
+        yield from iter_cache(default_cache_dir(path), chunk_rows)
+        return
+    header, offset = read_header(path)
+    for raw, _ in iter_csv_chunks(path, offset, header.split(','), chunk_bytes):
+        yield prepare(raw)
+
+def _concat(frames):
+    # cada lote tem suas próprias categorias: une as categorias em vez de cair para object
+    df_aux = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            df_aux[col] = union_categoricals([f[col] for f in frames], sort_categories=True)
+    return df_aux
+
+def _merge_indexes(parts):
+    # SketchIndex / GridIndex: o primeiro recebe os demais
+    return parts[0].merge(*parts[1:])
+
+class MergeTree:
+    """ Junta as partes mescláveis dos lotes em árvore, MERGE_FANOUT de cada vez
+
+        Juntar cada lote direto no acumulado refaz o agrupamento do acumulado
+        inteiro a cada lote. Aqui as partes esperam por nível, como os dígitos
+        de um contador: com fanout partes no mesmo nível, elas viram uma única
+        parte do nível seguinte. Cada célula passa por log(lotes) merges e
+        ficam à espera no máximo fanout - 1 partes por nível.
+    """
+
+    def __init__(self, merge, fanout=MERGE_FANOUT):
+        self.merge = merge  # lista de partes -> parte
+        self.fanout = fanout
+        self.levels = []  # levels[k]: partes à espera no nível k
+
+    def add(self, part):
+        """ Acrescenta a parte de um lote, juntando os níveis que ficarem cheios """
+        for level in itertools.count():
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].append(part)
+            if len(self.levels[level]) < self.fanout:
+                return
+            part = self.merge(self.levels[level])
+            self.levels[level] = []
+
+    def result(self):
+        """ Junta as partes de todos os níveis em uma só (None sem partes) """
+        parts = [part for level in self.levels for part in level]
+        if not parts:
+            return None
+        part = parts[0] if len(parts) == 1 else self.merge(parts)
+        self.levels = [[part]]
+        return part
+
+class ChunkedAggregates:
+    """ Agregados mescláveis de um dataset lido em lotes
+
+        cube, couriers: cubo diário e cubo por entregador
+        weekly:         WeeklyRollup
+        sketches:       SketchIndex
+        grid:           GridIndex (sem o índice das linhas)
+        sample:         amostra uniforme de até SAMPLE_ROWS linhas (coluna _priority)
+
+        Cubos, sketches e grade dos lotes ficam nas árvores de merge (ver
+        MergeTree) e só estão prontos depois de finish().
+    """
+
+    def __init__(self, sample_rows=SAMPLE_ROWS, seed=0):
+        self.rows = 0
+        self.chunks = 0
+        self.cube = None
+        self.couriers = None
+        self.weekly = WeeklyRollup()
+        self.sketches = None
+        self.grid = None
+        self.sample = None
+        self.sample_rows = sample_rows
+        self._rng = np.random.default_rng(seed)
+        self._trees = {'cube': MergeTree(merge_cubes), 'couriers': MergeTree(merge_courier_cubes),
+                       'sketches': MergeTree(_merge_indexes), 'grid': MergeTree(_merge_indexes)}
+
+    def add(self, df1):
+        """ Soma aos agregados um lote já limpo """
+        if not len(df1):
+            return self
+        self.rows += len(df1)
+        self.chunks += 1
+        self._trees['cube'].add(build_cube(df1))
+        self._trees['couriers'].add(build_courier_cube(df1))
+        self.weekly.extend(df1)
+        self._trees['sketches'].add(SketchIndex(df1))
+        self._trees['grid'].add(GridIndex(df1, with_rows=False))
+        self._add_sample(df1)
+        return self
+
+    def finish(self):
+        """ Junta as partes à espera: cube, couriers, sketches e grid ficam prontos """
+        for name, tree in self._trees.items():
+            setattr(self, name, tree.result())
+        return self
+
+    def _add_sample(self, df1):
+        # amostra sem reposição: cada linha recebe uma prioridade aleatória e ficam
+        # as sample_rows menores, o que vale igual para um lote ou para o dataset inteiro
+        df_aux = df1.assign(_priority=self._rng.random(len(df1)))
+        if self.sample is not None:
+            if len(self.sample) >= self.sample_rows:
+                df_aux = df_aux.loc[df_aux['_priority'] < self.sample['_priority'].max()]
+            df_aux = _concat([self.sample, df_aux])
+        if len(df_aux) > self.sample_rows:
+            df_aux = df_aux.nsmallest(self.sample_rows, '_priority')
+        self.sample = df_aux
+
+    def sample_frame(self):
+        """ A amostra como o dataframe limpo das páginas (ordenada por Order_Date) """
+        return sort_by_date(self.sample.drop(columns='_priority'))
+
+def aggregate(path, chunk_bytes=CHUNK_BYTES, chunk_rows=CHUNK_ROWS):
+    """ Esta função lê o dataset inteiro em lotes e devolve os agregados
+
+        Input: caminho do csv e tamanho dos lotes
+        Output: ChunkedAggregates
+    """
+    aggregates = ChunkedAggregates()
+    for df1 in iter_clean_chunks(path, chunk_bytes, chunk_rows):
+        with stage('chunked/lote'):
+            aggregates.add(df1)
+    with stage('chunked/merge'):
+        return aggregates.finish()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default='data/train.csv')
+    parser.add_argument('--chunk-mb', type=int, default=CHUNK_BYTES // 2 ** 20, help='tamanho dos lotes do csv em MB')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    aggregates = aggregate(args.csv, args.chunk_mb * 2 ** 20)
+    seconds = time.perf_counter() - start
+    # ru_maxrss em KB no Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print('%d linhas em %d lotes, %.1f s, pico de memória do processo %.0f MB'
+          % (aggregates.rows, aggregates.chunks, seconds, peak_mb))
+    print('cubo diário: %d células | cubo por entregador: %d células | sketches: %d células | amostra: %d linhas'
+          % (len(aggregates.cube), len(aggregates.couriers), len(aggregates.sketches.days), len(aggregates.sample)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# bibliotecas
+import numpy as np
+import pandas as pd
+
+from curry.dateindex import sort_by_date
+from curry.geo import haversine_km
+
+# colunas em que o dataset usa o texto 'NaN ' como valor ausente
+NAN_COLS = ['Delivery_person_Age', 'Road_traffic_density', 'City', 'Festival', 'multiple_deliveries']
+
+# colunas de baixa cardinalidade guardadas como category (dictionary encoding)
+CATEGORY_COLS = ['Delivery_person_ID', 'City', 'Road_traffic_density', 'Type_of_order', 'Type_of_vehicle',
+                 'Festival', 'Weatherconditions', 'Time_Orderd', 'Time_Order_picked']
+
+# inteiros pequenos: tipo mais estreito que comporta os valores do dataset
+INT_DTYPES = {
+    'Delivery_person_Age': np.int8,
+    'Vehicle_condition': np.int8,
+    'multiple_deliveries': np.int8,
+    'Time_taken(min)': np.int16,
+}
+
+# coordenadas em float32 (~1 m de precisão) depois do cálculo da distância
+COORD_COLS = ['Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude', 'Delivery_location_longitude']
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def _parse_by_value(serie, parse):
+    # colunas de baixa cardinalidade: converte cada valor distinto uma única vez
+    # e espalha o resultado pelos códigos (em vez de converter linha a linha)
+    codes, uniques = pd.factorize(serie)
+    return pd.Series(parse(uniques)[codes], index=serie.index, name=serie.name)
+
+def _to_category(serie, strip=True):
+    # dictionary encoding: remove os espaços apenas dos valores distintos
+    codes, uniques = pd.factorize(serie)
+    if strip:
+        uniques = uniques.str.strip()
+    # valores que ficam iguais depois do strip passam a ter o mesmo código
+    remap, categories = pd.factorize(uniques)
+    order = categories.argsort()
+    rank = order.argsort()
+    codes = np.where(codes < 0, -1, rank[remap[codes]])
+    categorical = pd.Categorical.from_codes(codes, categories[order])
+    return pd.Series(categorical, index=serie.index, name=serie.name)
+
+def clean_code(df1):
+    """ Esta função tem a responsabilidade de limpar o dataframe 
+    
+        Tipos de limpeza:
+        1. Remoção dos dados NaN (um único filtro combinado)
+        2. Mudança do tipo da coluna de dados
+        3. Remoção dos espaços das variáveis de texto
+        4. Formatação da coluna de datas 
+        5. Limpeza da coluna de tempo (remoção do texto da variável numérica)
+        6. Tipos compactos: category para baixa cardinalidade, ID como string
+           do Arrow e inteiros no menor tipo que comporta os valores
+
+        Input: Dataframe
+        Output: Dataframe
+    """
+    # 1. removendo as linhas com 'NaN ' em qualquer coluna com sentinela
+    # (cópia explícita: as colunas abaixo são reatribuídas e o resultado não pode
+    # depender do copy-on-write ligado pelo curry.data)
+    linhas_validas = (df1[NAN_COLS] != 'NaN ').all(axis=1)
+    df1 = df1.loc[linhas_validas].copy()
+
+    # 2. convertendo as colunas numéricas de texto para número
+    df1['Delivery_person_Age'] = _parse_by_value(df1['Delivery_person_Age'], lambda x: x.astype(int))
+    df1['Delivery_person_Ratings'] = _parse_by_value(df1['Delivery_person_Ratings'], lambda x: x.astype(float))
+    df1['multiple_deliveries'] = _parse_by_value(df1['multiple_deliveries'], lambda x: x.astype(int))
+
+    # 3. convertendo a coluna order_date de texto para data
+    df1['Order_Date'] = _parse_by_value(df1['Order_Date'], lambda x: pd.to_datetime(x, format='%d-%m-%Y').to_numpy())
+
+    # 4. removendo os espacos dentro das strings
+    df1['ID'] = df1['ID'].str.strip().astype('string[pyarrow]')
+    for col in CATEGORY_COLS:
+        df1[col] = _to_category(df1[col])
+    # o clima fica só com a condição ('Sunny' em vez de 'conditions Sunny')
+    df1['Weatherconditions'] = df1['Weatherconditions'].cat.rename_categories(lambda c: c.removeprefix('conditions '))
+
+    # 5. limpando a coluna de time taken 
+    df1['Time_taken(min)'] = _parse_by_value(df1['Time_taken(min)'], lambda x: x.str.removeprefix('(min) ').astype(int))
+
+    # 6. inteiros no menor tipo
+    df1 = df1.astype(INT_DTYPES)
+
+    return df1
+
+def add_distance(df1):
+    """ Esta função adiciona a coluna 'distance' (km) entre restaurante e local de entrega
+
+        Calculada uma única vez sobre o dataset limpo, com a haversine vetorizada;
+        em seguida as coordenadas passam para float32.
+
+        Input: Dataframe limpo
+        Output: Dataframe com a coluna distance
+    """
+    df1['distance'] = haversine_km(df1['Restaurant_latitude'], df1['Restaurant_longitude'],
+                                   df1['Delivery_location_latitude'], df1['Delivery_location_longitude'])
+    # a distância é calculada em float64; depois dela as coordenadas só vão para os mapas
+    df1[COORD_COLS] = df1[COORD_COLS].astype(np.float32)
+    return df1
+
+def prepare(df):
+    """ Esta função leva o csv bruto ao dataframe usado pelas páginas
+
+        clean_code + coluna de distância, com as linhas ordenadas por Order_Date.
+
+        Input: Dataframe bruto
+        Output: Dataframe limpo
+    """
+    return sort_by_date(add_distance(clean_code(df)))
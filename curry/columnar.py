@@ -0,0 +1,225 @@
+""" Cache colunar (Arrow/Feather) do dataset limpo
+
+    O csv bruto é convertido uma vez para arquivos Feather sem compressão, já
+    depois do clean_code (datas convertidas, minutos inteiros, categorias e a
+    coluna de distância). As páginas abrem esses arquivos com memory-map em vez
+    de fazer o parse do csv.
+
+    O modo append lê apenas os bytes acrescentados ao csv desde o último build e
+    grava novos segmentos, sem reescrever os anteriores.
+
+    O csv é lido em lotes de até CHUNK_BYTES (um segmento por lote): nem o
+    build nem o append precisam do arquivo inteiro em memória. iter_cache lê o
+    cache de volta em lotes de CHUNK_ROWS linhas (ver curry.chunked).
+
+    Uso (a partir da raiz do repositório):
+        python -m curry.columnar build
+        python -m curry.columnar append
+"""
+# bibliotecas
+import argparse
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from curry.cleaning import prepare
+
+MANIFEST = 'manifest.json'
+
+# bytes antes do offset usados para conferir que o trecho já lido não mudou
+FINGERPRINT_BYTES = 4096
+
+# tamanho dos lotes: bytes lidos do csv por vez e linhas lidas do cache por vez
+CHUNK_BYTES = 64 * 2 ** 20
+CHUNK_ROWS = 250_000
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def _fingerprint(path, offset):
+    with open(path, 'rb') as f:
+        f.seek(max(0, offset - FINGERPRINT_BYTES))
+        return hashlib.sha1(f.read(offset - max(0, offset - FINGERPRINT_BYTES))).hexdigest()
+
+def _read_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def _write_manifest(cache_dir, manifest):
+    # grava em arquivo temporário e renomeia: leitores nunca veem um manifest pela metade
+    path = os.path.join(cache_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def default_cache_dir(csv_path):
+    """ O cache fica em <diretório do csv>/cache """
+    return os.path.join(os.path.dirname(csv_path), 'cache')
+
+def _write_segment(cache_dir, manifest, df):
+    # numeração sempre crescente: um rebuild nunca sobrescreve um arquivo que
+    # outro processo ainda pode estar lendo via memory-map
+    name = 'part-%05d.feather' % manifest['next_segment']
+    manifest['next_segment'] += 1
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # sem compressão para permitir memory-map direto
+    feather.write_feather(table, os.path.join(cache_dir, name), compression='uncompressed')
+    return name
+
+def read_header(path):
+    """ Cabeçalho do csv e o offset (em bytes) da primeira linha de dados """
+    with open(path, 'rb') as f:
+        line = f.readline()
+    return line.decode().strip(), len(line)
+
+def iter_csv_chunks(path, offset, names, chunk_bytes=CHUNK_BYTES):
+    """ Esta função lê as linhas completas do csv a partir de offset, em lotes de ~chunk_bytes
+
+        A linha final sem '\n' é lida como uma linha completa: o offset
+        final é sempre o tamanho do arquivo (o mesmo que o cache_is_fresh compara).
+
+        Input: caminho do csv, offset inicial, nomes das colunas e tamanho do lote
+        Output: gerador de (Dataframe bruto do lote, offset depois do lote)
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        rest = b''
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                if rest:
+                    yield pd.read_csv(io.BytesIO(rest + b'\n'), header=None, names=names), offset + len(rest)
+                return
+            data = rest + data
+            end = data.rfind(b'\n') + 1
+            rest = data[end:]
+            if end:
+                offset += end
+                yield pd.read_csv(io.BytesIO(data[:end]), header=None, names=names), offset
+
+def _append_chunks(csv_path, cache_dir, manifest, names, chunk_bytes):
+    # limpa e grava um segmento por lote, a partir do offset do manifest
+    for raw, offset in iter_csv_chunks(csv_path, manifest['offset'], names, chunk_bytes):
+        df = prepare(raw)
+        if len(df):
+            manifest['segments'].append(_write_segment(cache_dir, manifest, df))
+            manifest['rows'] += len(df)
+        manifest['offset'] = offset
+    manifest['fingerprint'] = _fingerprint(csv_path, manifest['offset'])
+
+def _source_state(csv_path):
+    stat = os.stat(csv_path)
+    return {'source': os.path.abspath(csv_path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+def build_cache(csv_path, cache_dir=None, chunk_bytes=CHUNK_BYTES):
+    """ Esta função converte o csv inteiro em segmentos colunares (um por lote)
+
+        Input: caminho do csv, diretório do cache e tamanho dos lotes
+        Output: manifest gravado
+    """
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    header, offset = read_header(csv_path)
+
+    old = _read_manifest(cache_dir)
+    manifest = dict(_source_state(csv_path), header=header, offset=offset, rows=0,
+                    segments=[], next_segment=old['next_segment'] if old else 0)
+    _append_chunks(csv_path, cache_dir, manifest, header.split(','), chunk_bytes)
+    _write_manifest(cache_dir, manifest)
+
+    # segmentos antigos só são removidos depois que o novo manifest está gravado
+    for name in (old['segments'] if old else []):
+        os.remove(os.path.join(cache_dir, name))
+    return manifest
+
+def append_cache(csv_path, cache_dir=None, chunk_bytes=CHUNK_BYTES):
+    """ Esta função acrescenta ao cache apenas as linhas novas do csv
+
+        Se o cache não existe, ou se o trecho já ingerido do csv mudou (arquivo
+        reescrito em vez de acrescentado), faz o build completo.
+
+        Input: caminho do csv e diretório do cache
+        Output: manifest gravado
+    """
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    manifest = _read_manifest(cache_dir)
+    size = os.path.getsize(csv_path)
+    if (manifest is None or size < manifest['offset']
+            or _fingerprint(csv_path, manifest['offset']) != manifest['fingerprint']):
+        return build_cache(csv_path, cache_dir, chunk_bytes)
+
+    _append_chunks(csv_path, cache_dir, manifest, manifest['header'].split(','), chunk_bytes)
+
+    state = _source_state(csv_path)
+    manifest['mtime_ns'] = state['mtime_ns']
+    manifest['size'] = state['size']
+    _write_manifest(cache_dir, manifest)
+    return manifest
+
+def cache_is_fresh(csv_path, cache_dir=None):
+    """ Retorna True se o cache corresponde à versão atual do csv (mtime e tamanho). """
+    manifest = _read_manifest(cache_dir or default_cache_dir(csv_path))
+    if manifest is None:
+        return False
+    state = _source_state(csv_path)
+    return manifest['mtime_ns'] == state['mtime_ns'] and manifest['size'] == state['size']
+
+def _string_dtype(arrow_type):
+    # colunas de texto (não categóricas) voltam como string do Arrow
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype('pyarrow')
+    return None
+
+def _segments(cache_dir):
+    # tabelas dos segmentos, com memory-map (nada é copiado até o to_pandas)
+    manifest = _read_manifest(cache_dir)
+    for name in manifest['segments']:
+        source = pa.memory_map(os.path.join(cache_dir, name), 'r')
+        yield pa.ipc.open_file(source).read_all()
+
+def _to_pandas(table):
+    # sem os metadados do pandas o ID voltaria como string[python]
+    return table.to_pandas(ignore_metadata=True, types_mapper=_string_dtype)
+
+def load_cache(cache_dir):
+    """ Esta função abre os segmentos do cache com memory-map e devolve o dataframe limpo
+
+        Input: diretório do cache
+        Output: Dataframe
+    """
+    return _to_pandas(pa.concat_tables(list(_segments(cache_dir)), promote_options='permissive'))
+
+def iter_cache(cache_dir, chunk_rows=CHUNK_ROWS):
+    """ Esta função lê o cache em lotes de até chunk_rows linhas (dataframes já limpos)
+
+        Input: diretório do cache e tamanho dos lotes
+        Output: gerador de Dataframes
+    """
+    for table in _segments(cache_dir):
+        for start in range(0, table.num_rows, chunk_rows):
+            yield _to_pandas(table.slice(start, chunk_rows))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=['build', 'append'])
+    parser.add_argument('--csv', default='data/train.csv')
+    parser.add_argument('--cache-dir', default=None, help='padrão: <diretório do csv>/cache')
+    args = parser.parse_args()
+
+    if args.mode == 'build':
+        manifest = build_cache(args.csv, args.cache_dir)
+    else:
+        manifest = append_cache(args.csv, args.cache_dir)
+    print('%d linhas em %d segmento(s)' % (manifest['rows'], len(manifest['segments'])))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+""" Cubo diário pré-agregado dos pedidos
+
+    Cada célula do cubo é uma combinação de (data, cidade, trânsito, festival,
+    tipo de pedido, clima) com a quantidade de pedidos e a soma e a soma dos
+    quadrados de cada medida. Média e desvio padrão de qualquer recorte saem da
+    soma das células, sem voltar às linhas do dataset.
+"""
+# bibliotecas
+import numpy as np
+import pandas as pd
+
+from curry.dateindex import all_selected
+
+DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Festival', 'Type_of_order', 'Weatherconditions']
+MEASURES = ['Time_taken(min)', 'Delivery_person_Ratings', 'distance']
+
+# cubo por entregador: agregados parciais dos groupbys por Delivery_person_ID.
+# Cada coluna tem a operação que junta duas partes (soma, máximo ou mínimo).
+COURIER_DIMENSIONS = ['Order_Date', 'Road_traffic_density', 'City', 'Delivery_person_ID']
+COURIER_AGGS = {
+    'count': ('Delivery_person_Ratings', 'size', 'sum'),
+    'Delivery_person_Ratings_sum': ('Delivery_person_Ratings', 'sum', 'sum'),
+    'Time_taken(min)_max': ('Time_taken(min)', 'max', 'max'),
+    'Delivery_person_Age_max': ('Delivery_person_Age', 'max', 'max'),
+    'Delivery_person_Age_min': ('Delivery_person_Age', 'min', 'min'),
+    'Vehicle_condition_max': ('Vehicle_condition', 'max', 'max'),
+    'Vehicle_condition_min': ('Vehicle_condition', 'min', 'min'),
+}
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def build_cube(df1):
+    """ Esta função agrega o dataframe limpo no cubo diário
+
+        Input: Dataframe limpo
+        Output: Dataframe com as dimensões, 'count' e '<medida>_sum' / '<medida>_sumsq'
+    """
+    # medidas em float64: o esquema compacto guarda o tempo em int16, e a soma (e o
+    # quadrado da soma no cube_stats) estouraria o tipo
+    values = {m: df1[m].astype(np.float64) for m in MEASURES}
+    squares = {m + '_sq': values[m] ** 2 for m in MEASURES}
+    df_aux = df1[DIMENSIONS].assign(**values, **squares)
+
+    aggs = {'count': ('Time_taken(min)', 'size')}
+    for m in MEASURES:
+        aggs[m + '_sum'] = (m, 'sum')
+        aggs[m + '_sumsq'] = (m + '_sq', 'sum')
+
+    return df_aux.groupby(DIMENSIONS, observed=True).agg(**aggs).reset_index()
+
+def filter_cube(cube, start, end, traffic_options):
+    """ Aplica ao cubo os mesmos filtros da barra lateral (período [start, end) e trânsito) """
+    # o cubo sai do groupby ordenado por Order_Date: o corte de datas é uma busca binária
+    dates = cube['Order_Date']
+    first = 0 if start is None else dates.searchsorted(start)
+    cube = cube.iloc[first:max(first, dates.searchsorted(end))]
+    if all_selected(cube['Road_traffic_density'], traffic_options):
+        return cube
+    linhas_selecionadas = cube['Road_traffic_density'].isin(traffic_options)
+    return cube.loc[linhas_selecionadas, :]
+
+def cube_count(cube, by):
+    """ Esta função conta os pedidos agrupados por uma ou mais dimensões
+
+        Input: cubo (filtrado) e dimensão(ões)
+        Output: Dataframe com as dimensões e a coluna 'count'
+    """
+    return cube.groupby(by, observed=True)['count'].sum().reset_index()
+
+def cube_stats(cube, by, measure):
+    """ Esta função calcula quantidade, média e desvio padrão de uma medida por grupo
+
+        O desvio padrão é o amostral (ddof=1), o mesmo do pandas:
+            var = (soma_quadrados - soma² / n) / (n - 1)
+
+        Input: cubo (filtrado), dimensão(ões) (None para o total) e medida
+        Output: Dataframe com as dimensões e as colunas count, mean e std
+    """
+    cols = ['count', measure + '_sum', measure + '_sumsq']
+    if by is None:
+        df_aux = cube[cols].sum().to_frame().T
+        df_aux['count'] = df_aux['count'].astype(np.int64)
+    else:
+        df_aux = cube.groupby(by, observed=True)[cols].sum().reset_index()
+
+    n = df_aux['count'].astype(np.float64)
+    total = df_aux[measure + '_sum'].astype(np.float64)
+    var = (df_aux[measure + '_sumsq'] - total ** 2 / n) / (n - 1)
+
+    df_aux['mean'] = total / n
+    # erros de arredondamento podem deixar a variância levemente negativa
+    df_aux['std'] = np.sqrt(var.clip(lower=0)).where(n > 1)
+    return df_aux.drop(columns=[measure + '_sum', measure + '_sumsq'])
+
+def build_courier_cube(df1):
+    """ Esta função agrega o dataframe limpo no cubo por entregador (ver COURIER_AGGS)
+
+        Input: Dataframe limpo
+        Output: Dataframe com COURIER_DIMENSIONS e as colunas de COURIER_AGGS, ordenado por Order_Date
+    """
+    aggs = {name: (col, op) for name, (col, op, _) in COURIER_AGGS.items()}
+    return df1.groupby(COURIER_DIMENSIONS, observed=True).agg(**aggs).reset_index()
+
+def merge_cubes(cubes, dimensions=DIMENSIONS, aggs=None):
+    """ Esta função junta cubos de partes diferentes dos dados em um único cubo
+
+        As células são aditivas (quantidade, soma e soma dos quadrados): células
+        com as mesmas dimensões são somadas, sem voltar às linhas. Colunas que
+        se juntam de outra forma (máximo, mínimo) vão em aggs.
+
+        Input:
+            - cubes: lista de cubos (None é ignorado)
+            - dimensions: dimensões do cubo (a primeira é Order_Date)
+            - aggs: dict coluna -> operação ('sum', 'max', 'min'); None = soma de tudo
+        Output: Dataframe do cubo, ordenado por Order_Date
+    """
+    df_aux = pd.concat([c for c in cubes if c is not None], ignore_index=True)
+    # cada parte tem suas próprias categorias; o concat devolve object nesses casos
+    for col in dimensions[1:]:
+        if df_aux[col].dtype == object:
+            df_aux[col] = df_aux[col].astype('category')
+    grouped = df_aux.groupby(dimensions, observed=True)
+    return (grouped.sum() if aggs is None else grouped.agg(aggs)).reset_index()
+
+def merge_courier_cubes(cubes):
+    """ merge_cubes para o cubo por entregador """
+    return merge_cubes(cubes, COURIER_DIMENSIONS, {name: merge for name, (_, _, merge) in COURIER_AGGS.items()})
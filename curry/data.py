@@ -0,0 +1,202 @@
+# bibliotecas
+import os
+
+import pandas as pd
+
+from curry.chunked import aggregate
+from curry.cleaning import prepare
+from curry.columnar import cache_is_fresh, default_cache_dir, load_cache
+from curry.cube import build_cube
+from curry.dateindex import DateIndex, DayTotals, sort_by_date
+from curry.executor import once_per_key
+from curry.grid import GridIndex
+from curry.parallel import build_courier_cube
+from curry.profiling import stage
+from curry.sketches import SketchIndex
+from curry.weekly import WeeklyRollup
+
+# as páginas recebem cópias rasas do dataframe em cache; com copy-on-write
+# qualquer alteração feita por uma página não chega ao dataframe compartilhado
+pd.set_option('mode.copy_on_write', True)
+
+DATA_PATH = 'data/train.csv'
+
+# acima desse tamanho o csv não é lido inteiro para a memória: as páginas usam os
+# agregados do processamento em lotes e uma amostra das linhas (ver curry.chunked)
+MAX_IN_MEMORY_BYTES = int(os.environ.get('CURRY_MAX_IN_MEMORY_BYTES', 2 * 2 ** 30))
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def data_version(path=DATA_PATH):
+    """ Retorna a versão do arquivo de dados: (caminho, mtime, tamanho).
+
+        Qualquer alteração no arquivo muda a versão e invalida o cache.
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+def _out_of_core(version):
+    return os.environ.get('CURRY_OUT_OF_CORE', '') not in ('', '0') or version[2] > MAX_IN_MEMORY_BYTES
+
+def out_of_core(path=DATA_PATH):
+    """ True se o dataset é processado em lotes (CURRY_OUT_OF_CORE=1 ou csv maior que MAX_IN_MEMORY_BYTES)
+
+        Nesse modo as linhas em memória são só uma amostra: cubos, agregado
+        semanal, sketches e grade cobrem o dataset inteiro, mas o modo exato
+        e a consulta por raio ficam indisponíveis.
+    """
+    return _out_of_core(data_version(path))
+
+@once_per_key
+def _load_chunked(version):
+    with stage('chunked'):
+        return aggregate(version[0])
+
+@once_per_key
+def _load_clean(version):
+    # lido e limpo uma única vez por processo e por versão do arquivo;
+    # se o cache colunar estiver em dia, abre ele em vez de fazer o parse do csv
+    # as linhas ficam ordenadas por Order_Date (ver curry.dateindex); cada segmento
+    # do cache já vem ordenado, mas um append pode trazer datas anteriores
+    if _out_of_core(version):
+        return _load_chunked(version).sample_frame()
+    path = version[0]
+    if cache_is_fresh(path):
+        with stage('load_cache'):
+            return sort_by_date(load_cache(default_cache_dir(path)))
+    with stage('load_csv'):
+        df = pd.read_csv(path)
+    with stage('clean_code'):
+        return prepare(df)
+
+def load_data(path=DATA_PATH):
+    """ Esta função entrega o dataframe limpo compartilhado entre as páginas
+
+        O arquivo é lido e limpo uma vez por processo (ou aberto do cache colunar,
+        ver curry.columnar, quando ele está em dia); o resultado fica em cache
+        enquanto o mtime e o tamanho do arquivo não mudarem. No modo out-of-core
+        (ver out_of_core) é uma amostra uniforme das linhas. A coluna 'distance'
+        já vem calculada e as linhas vêm ordenadas por Order_Date.
+
+        Cada chamada recebe uma cópia rasa (sem copiar os dados), que pode ser
+        filtrada ou receber novas colunas sem alterar o cache.
+
+        Input: caminho do csv
+        Output: Dataframe
+    """
+    return _load_clean(data_version(path)).copy(deep=False)
+
+@once_per_key
+def _load_cube(version):
+    if _out_of_core(version):
+        return _load_chunked(version).cube
+    df1 = _load_clean(version)
+    with stage('build_cube'):
+        return build_cube(df1)
+
+def load_cube(path=DATA_PATH):
+    """ Esta função entrega o cubo diário (ver curry.cube) do dataset atual
+
+        Construído uma vez por processo e por versão do arquivo de dados.
+
+        Input: caminho do csv
+        Output: Dataframe do cubo
+    """
+    return _load_cube(data_version(path)).copy(deep=False)
+
+@once_per_key
+def _load_couriers(version):
+    if _out_of_core(version):
+        return _load_chunked(version).couriers
+    df1 = _load_clean(version)
+    # dividido por entregador entre processos em datasets grandes (ver curry.parallel)
+    with stage('courier_cube'):
+        return build_courier_cube(df1)
+
+def load_couriers(path=DATA_PATH):
+    """ Esta função entrega o cubo por entregador (ver curry.cube) do dataset atual
+
+        Input: caminho do csv
+        Output: Dataframe do cubo
+    """
+    return _load_couriers(data_version(path)).copy(deep=False)
+
+@once_per_key
+def _load_date_index(version):
+    df1 = _load_clean(version)
+    with stage('date_index'):
+        return DateIndex(df1)
+
+def load_date_index(path=DATA_PATH):
+    """ Esta função entrega o índice de datas (ver curry.dateindex) do dataset atual
+
+        Input: caminho do csv
+        Output: DateIndex
+    """
+    return _load_date_index(data_version(path))
+
+@once_per_key
+def _load_day_totals(version):
+    cube = _load_cube(version)
+    with stage('day_totals'):
+        return DayTotals(cube)
+
+def load_day_totals(path=DATA_PATH):
+    """ Esta função entrega os acumulados por dia do cubo diário (ver curry.dateindex) do dataset atual
+
+        Saem do cubo, que cobre o dataset inteiro também no modo out-of-core.
+
+        Input: caminho do csv
+        Output: DayTotals
+    """
+    return _load_day_totals(data_version(path))
+
+@once_per_key
+def _load_weekly(version):
+    if _out_of_core(version):
+        return _load_chunked(version).weekly
+    df1 = _load_clean(version)
+    with stage('weekly_rollup'):
+        return WeeklyRollup(df1)
+
+def load_weekly(path=DATA_PATH):
+    """ Esta função entrega o agregado semanal (ver curry.weekly) do dataset atual
+
+        Input: caminho do csv
+        Output: WeeklyRollup
+    """
+    return _load_weekly(data_version(path))
+
+@once_per_key
+def _load_grid(version):
+    if _out_of_core(version):
+        return _load_chunked(version).grid
+    df1 = _load_clean(version)
+    with stage('grid_index'):
+        return GridIndex(df1)
+
+def load_grid(path=DATA_PATH):
+    """ Esta função entrega o índice espacial em grade (ver curry.grid) do dataset atual
+
+        Input: caminho do csv
+        Output: GridIndex
+    """
+    return _load_grid(data_version(path))
+
+@once_per_key
+def _load_sketches(version):
+    if _out_of_core(version):
+        return _load_chunked(version).sketches
+    df1 = _load_clean(version)
+    with stage('sketch_index'):
+        return SketchIndex(df1)
+
+def load_sketches(path=DATA_PATH):
+    """ Esta função entrega os sketches por (dia, trânsito) (ver curry.sketches) do dataset atual
+
+        Input: caminho do csv
+        Output: SketchIndex
+    """
+    return _load_sketches(data_version(path))
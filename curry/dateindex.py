@@ -0,0 +1,157 @@
+""" Índice de datas sobre o dataset ordenado por Order_Date
+
+    Com as linhas ordenadas por data, o filtro "pedidos entre as datas X e Y"
+    vira duas buscas binárias e um slice (sem copiar dados). Os acumulados por
+    dia do cubo diário (DayTotals) respondem "quantos pedidos / qual a média
+    entre X e Y" pela diferença de dois prefixos, em tempo constante qualquer
+    que seja o tamanho do intervalo.
+
+    Os intervalos são [start, end): start entra, end não (como no filtro
+    original "Order_Date < data limite"); start=None é o início do dataset.
+"""
+# bibliotecas
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def sort_by_date(df1):
+    """ Ordena o dataframe por Order_Date (ordenação estável) se ainda não estiver ordenado """
+    if df1['Order_Date'].is_monotonic_increasing:
+        return df1
+    return df1.sort_values('Order_Date', kind='stable', ignore_index=True)
+
+def all_selected(serie, options):
+    """ True se as opções cobrem todas as categorias da coluna (o filtro não remove nada) """
+    return set(serie.cat.categories) <= set(options)
+
+class DateIndex:
+    """ Índice data -> posição da linha sobre um dataframe ordenado por Order_Date
+
+        days:   dias distintos, em ordem
+        starts: posição da primeira linha de cada dia (starts[-1] = total de linhas)
+    """
+
+    def __init__(self, df1):
+        dates = df1['Order_Date'].to_numpy()
+        self.days, first = np.unique(dates, return_index=True)
+        self.starts = np.append(first, len(dates))
+
+    def _day_position(self, date):
+        # quantidade de dias distintos anteriores a date (busca binária)
+        return int(np.searchsorted(self.days, np.datetime64(pd.Timestamp(date), 'ns'), side='left'))
+
+    def _range_positions(self, start, end):
+        # posições (em dias) do intervalo [start, end)
+        first = 0 if start is None else self._day_position(start)
+        return first, max(first, self._day_position(end))
+
+    def rows(self, start, end):
+        """ Posições [primeira, última) das linhas com start <= Order_Date < end """
+        first, last = self._range_positions(start, end)
+        return int(self.starts[first]), int(self.starts[last])
+
+    def between(self, df1, start, end):
+        """ Linhas com start <= Order_Date < end, como slice do dataframe ordenado (sem cópia) """
+        first, last = self.rows(start, end)
+        return df1.iloc[first:last]
+
+    def select(self, df1, start, end, traffic_options):
+        """ Linhas com start <= Order_Date < end e trânsito entre os escolhidos
+
+            Com todos os níveis de trânsito escolhidos (o padrão da barra
+            lateral) o resultado é o próprio slice, sem cópia das linhas.
+        """
+        df1 = self.between(df1, start, end)
+        if all_selected(df1['Road_traffic_density'], traffic_options):
+            return df1
+        return df1.loc[df1['Road_traffic_density'].isin(traffic_options), :]
+
+class DayTotals:
+    """ Acumulados por dia das células do cubo diário (ver curry.cube)
+
+        As células de cada dia são somadas por combinação das outras dimensões
+        (cidade, trânsito, festival, ...) e acumuladas dia a dia. Os totais de
+        um período [start, end) são a diferença de dois prefixos: o custo não
+        depende da quantidade de dias do período, só da quantidade de
+        combinações. A memória é da ordem de dias x combinações x colunas.
+
+        days:    dias distintos do cubo, em ordem
+        groups:  Dataframe com uma linha por combinação das dimensões
+        columns: colunas somadas (count, somas e somas dos quadrados)
+        cum:     array (dias + 1, combinações, colunas); cum[k] = totais dos dias anteriores a days[k]
+    """
+
+    def __init__(self, cube):
+        dimensions = [c for c in cube.columns if isinstance(cube[c].dtype, pd.CategoricalDtype)]
+        self.columns = [c for c in cube.columns if pd.api.types.is_numeric_dtype(cube[c])]
+        dates = cube['Order_Date'].to_numpy()
+        self.days, day = np.unique(dates, return_inverse=True)
+
+        grouped = cube.groupby(dimensions, observed=True)
+        group = grouped.ngroup().to_numpy()
+        self.groups = grouped.size().index.to_frame(index=False)
+
+        per_day = np.zeros((len(self.days) + 1, len(self.groups), len(self.columns)))
+        np.add.at(per_day, (day + 1, group), cube[self.columns].to_numpy(dtype=np.float64))
+        self.cum = np.cumsum(per_day, axis=0)
+
+    def _day_position(self, date):
+        # quantidade de dias distintos anteriores a date (busca binária)
+        return int(np.searchsorted(self.days, np.datetime64(pd.Timestamp(date), 'ns'), side='left'))
+
+    def _window(self, start, end, traffic_options):
+        # totais (combinações x colunas) do período e máscara das combinações com o trânsito escolhido
+        first = 0 if start is None else self._day_position(start)
+        last = max(first, self._day_position(end))
+        totals = self.cum[last] - self.cum[first]
+        traffic = self.groups['Road_traffic_density']
+        if all_selected(traffic, traffic_options):
+            return totals, np.ones(len(self.groups), dtype=bool)
+        return totals, traffic.isin(traffic_options).to_numpy()
+
+    def bounds(self):
+        """ Primeiro e último dia do dataset (None, None se vazio) """
+        if not len(self.days):
+            return None, None
+        return pd.Timestamp(self.days[0]).to_pydatetime(), pd.Timestamp(self.days[-1]).to_pydatetime()
+
+    def between(self, start, end, traffic_options):
+        """ Esta função soma as células do cubo do período por combinação das dimensões
+
+            O resultado tem as mesmas colunas do cubo (sem Order_Date) e serve
+            às mesmas funções (cube_count, cube_stats) no lugar do cubo filtrado.
+
+            Input: período [start, end) e níveis de trânsito escolhidos
+            Output: Dataframe com as dimensões e as colunas somadas (só combinações com pedidos)
+        """
+        totals, selected = self._window(start, end, traffic_options)
+        df_aux = self.groups.assign(**{c: totals[:, k] for k, c in enumerate(self.columns)})
+        # as quantidades são inteiras; a diferença de prefixos em float64 é exata até 2**53
+        df_aux['count'] = np.rint(df_aux['count']).astype(np.int64)
+        return df_aux.loc[selected & (df_aux['count'] > 0).to_numpy(), :].reset_index(drop=True)
+
+    def orders_between(self, start, end, traffic_options):
+        """ Quantidade de pedidos com start <= Order_Date < end (diferença de prefixos) """
+        totals, selected = self._window(start, end, traffic_options)
+        return int(round(totals[selected, self.columns.index('count')].sum()))
+
+    def sum_between(self, measure, start, end, traffic_options):
+        """ Soma de uma medida nos pedidos com start <= Order_Date < end (diferença de prefixos) """
+        totals, selected = self._window(start, end, traffic_options)
+        return float(totals[selected, self.columns.index(measure + '_sum')].sum())
+
+    def mean_between(self, measure, start, end, traffic_options):
+        """ Média de uma medida nos pedidos com start <= Order_Date < end (None se não há pedidos) """
+        orders = self.orders_between(start, end, traffic_options)
+        return self.sum_between(measure, start, end, traffic_options) / orders if orders else None
+
+    def orders_until(self, date, traffic_options):
+        """ Quantidade de pedidos com Order_Date < date """
+        return self.orders_between(None, date, traffic_options)
+
+    def sum_until(self, measure, date, traffic_options):
+        """ Soma de uma medida nos pedidos com Order_Date < date """
+        return self.sum_between(measure, None, date, traffic_options)
@@ -0,0 +1,194 @@
+""" Cálculos da página Visão Empresa (sem Streamlit)
+
+    Cada função recebe o cubo diário ou o dataframe já filtrado e devolve a
+    figura/mapa pronto; a página só cuida da barra lateral e do layout.
+
+    O plotly, como o folium (ver curry.maps), só é importado ao montar uma
+    figura, e não ao abrir as páginas.
+"""
+# bibliotecas
+import numpy as np
+
+from curry.cube import cube_count
+from curry.data import load_data, load_date_index, load_grid
+from curry.dateindex import all_selected
+from curry.maps import cluster_map, heat_map, map_html
+from curry.timeseries import bin_by_period, downsample_line
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def order_metric(cube):
+    import plotly.express as px
+
+    # quantidade de pedidos por dia, somando as células do cubo
+    df_aux = cube_count(cube, 'Order_Date').rename(columns={'count': 'ID'})
+    # intervalos longos viram barras por semana ou por mês (no máximo MAX_BARS barras)
+    df_aux, period = bin_by_period(df_aux, 'Order_Date', 'ID')
+    labels = {} if period == 'dia' else {'Order_Date': 'Order_Date (por %s)' % period}
+    # desenhar o gráfico de linhas
+    # Plotly
+    fig = px.bar(df_aux, x='Order_Date',
+                y='ID', labels=labels)            
+    return fig
+
+def traffic_order_share(cube):
+    import plotly.express as px
+
+    df_aux = cube_count(cube, 'Road_traffic_density').rename(columns={'count': 'ID'})
+    df_aux['entregas_perc'] = df_aux['ID'] / df_aux['ID'].sum()
+    fig = px.pie(df_aux, values='entregas_perc',
+                names='Road_traffic_density')   
+                 
+    return fig
+
+def traffic_order_city(cube):
+    import plotly.express as px
+
+    df_aux = cube_count(cube, ['City', 'Road_traffic_density']).rename(columns={'count': 'ID'})
+    fig = px.scatter(df_aux, x='City',
+                    y='Road_traffic_density',
+                    size='ID',
+                    color='City')
+    
+    return fig
+
+def order_by_week(weekly):
+    import plotly.express as px
+
+    # quantidade de pedidos por semana, direto da tabela semanal (ver curry.weekly)
+    # linhas longas são reduzidas pelo LTTB, mantendo picos e vales
+    fig = px.line(downsample_line(weekly, 'week_of_year', 'ID'), x='week_of_year',
+                y='ID')            
+    return fig
+
+def order_share_by_week(weekly):
+    import plotly.express as px
+
+    # quantidade de pedidos por semana / número único de entregadores por semana
+    df_aux = weekly.assign(order_by_delivery=weekly['ID'] / weekly['Delivery_person_ID'])
+    df_aux = downsample_line(df_aux, 'week_of_year', 'order_by_delivery')
+    fig = px.line(df_aux, x='week_of_year',
+                y='order_by_delivery')
+    
+    return fig
+
+def country_maps(df1):
+    # import só aqui: o folium é pesado e só o mapa precisa dele (ver curry.maps)
+    import folium
+
+    df_aux = df1[['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']].groupby(['City', 'Road_traffic_density'], observed=True)\
+                                                                                                        .median().reset_index()
+    map = folium.Map()
+    for i in range(len(df_aux)):
+            folium.Marker([df_aux.loc[i,'Delivery_location_latitude'], df_aux.loc[i,'Delivery_location_longitude']],
+            popup=df_aux.loc[i, ['City', 'Road_traffic_density']]).add_to(map)
+    #for index, location_info in df_aux.iterrows():
+    #    folium.Marker([location_info['Delivery_location_latitude'], 
+    #                  location_info['Delivery_location_longitude']]).add_to(map)        
+    return map
+
+def grid_map(cells):
+    import plotly.express as px
+
+    # uma bolha por célula da grade: tamanho = pedidos, cor = tempo médio de entrega
+    fig = px.scatter_map(cells, lat='latitude', lon='longitude', size='count', color='mean',
+                         hover_data={'latitude': False, 'longitude': False, 'count': True, 'mean': ':.1f', 'std': ':.1f'},
+                         labels={'count': 'pedidos', 'mean': 'tempo médio (min)', 'std': 'desvio padrão (min)'},
+                         color_continuous_scale='RdYlGn_r', map_style='carto-positron', zoom=3.5)
+    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+    return fig
+
+def orders_within(df1, date_index, grid, start, end, traffic_options, lat, lon, radius_km):
+    """ Esta função resume os pedidos entregues a até radius_km de um ponto (um restaurante)
+
+        As linhas candidatas saem do índice em grade (ver curry.grid); o período
+        vira um intervalo de posições no índice de datas.
+
+        Input:
+            - df1, date_index, grid: dataset ordenado por data e seus índices
+            - start, end, traffic_options: filtros (ver curry.filters)
+            - lat, lon, radius_km: ponto e raio em km
+        Output: dict com orders, avg_time, std_time e avg_distance (None sem pedidos);
+                None se a grade não tem o índice das linhas (modo out-of-core)
+    """
+    positions = grid.within(lat, lon, radius_km)
+    if positions is None:
+        return None
+    first, last = date_index.rows(start, end)
+    positions = positions[(positions >= first) & (positions < last)]
+    df_aux = df1.iloc[positions]
+    if not all_selected(df_aux['Road_traffic_density'], traffic_options):
+        df_aux = df_aux.loc[df_aux['Road_traffic_density'].isin(traffic_options), :]
+
+    if not len(df_aux):
+        return {'orders': 0, 'avg_time': None, 'std_time': None, 'avg_distance': None}
+    std_time = df_aux['Time_taken(min)'].std()
+    return {'orders': len(df_aux),
+            'avg_time': round(float(df_aux['Time_taken(min)'].mean()), 2),
+            'std_time': None if np.isnan(std_time) else round(float(std_time), 2),
+            'avg_distance': round(float(df_aux['distance'].mean()), 2)}
+
+# modos do mapa geográfico: nome -> função que monta o folium.Map
+MAP_MODES = {
+    'Medianas por cidade': country_maps,
+    'Entregas (clusters)': cluster_map,
+    'Entregas (mapa de calor)': heat_map,
+}
+DEFAULT_MAP_MODE = 'Medianas por cidade'
+
+# pontos da grade geográfica: nome mostrado -> pontos do curry.grid
+GRID_POINTS = {
+    'Locais de entrega': 'entrega',
+    'Restaurantes': 'restaurante',
+}
+DEFAULT_GRID_POINTS = 'entrega'
+DEFAULT_RADIUS_KM = 10
+
+def default_restaurant(path):
+    """ Restaurante (latitude, longitude) com mais pedidos: o padrão do seletor da página """
+    restaurants = load_grid(path).restaurants
+    return float(restaurants.iloc[0, 0]), float(restaurants.iloc[0, 1])
+
+# abas da página, na ordem mostrada; só os widgets da aba aberta são calculados
+TABS = ['Visão Gerencial', 'Visão Tática', 'Visão Geográfica']
+
+def widgets(filtros, map_mode=DEFAULT_MAP_MODE, grid_points=DEFAULT_GRID_POINTS, restaurant=None,
+            radius_km=DEFAULT_RADIUS_KM, tabs=TABS):
+    """ Esta função lista os cálculos da página para um estado dos filtros
+
+        Input:
+            - filtros: Filtros (ver curry.filters)
+            - map_mode: modo do mapa
+            - grid_points: pontos da grade ('entrega' ou 'restaurante')
+            - restaurant: (latitude, longitude) da consulta por raio (None = default_restaurant)
+            - radius_km: raio da consulta em km
+            - tabs: abas cujos widgets entram na lista (padrão: todas, como no warm-up)
+        Output: dict nome do widget -> função sem argumentos
+    """
+    calculos = {}
+    if 'Visão Gerencial' in tabs:
+        calculos.update({
+            'order_metric': lambda: order_metric(filtros.cubo()),
+            # pedidos do período por trânsito / cidade: totais do período (diferença de prefixos)
+            'traffic_order_share': lambda: traffic_order_share(filtros.totais()),
+            'traffic_order_city': lambda: traffic_order_city(filtros.totais()),
+        })
+    if 'Visão Tática' in tabs:
+        calculos.update({
+            'order_by_week': lambda: order_by_week(filtros.semanas()),
+            'order_share_by_week': lambda: order_share_by_week(filtros.semanas()),
+        })
+    if 'Visão Geográfica' in tabs:
+        lat, lon = default_restaurant(filtros.path) if restaurant is None else restaurant
+        calculos.update({
+            # o HTML do mapa fica no cache por modo e estado dos filtros
+            'country_maps/' + map_mode: lambda: map_html(MAP_MODES[map_mode](filtros.linhas())),
+            'grid_map/' + grid_points: lambda: grid_map(load_grid(filtros.path).cell_stats(
+                grid_points, filtros.start, filtros.end, filtros.traffic_options)),
+            'orders_within/%.6f,%.6f/%g' % (lat, lon, radius_km): lambda: orders_within(
+                load_data(filtros.path), load_date_index(filtros.path), load_grid(filtros.path),
+                filtros.start, filtros.end, filtros.traffic_options, lat, lon, radius_km),
+        })
+    return calculos
@@ -0,0 +1,96 @@
+""" Cálculos da página Visão Entregadores (sem Streamlit) """
+# bibliotecas
+import numpy as np
+
+from curry.cube import cube_stats
+from curry.metrics import Metric, compute_metrics
+from curry.parallel import sharded_groupby
+
+DEFAULT_TOP_N = 10
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+# métricas da linha "Overall Metrics", calculadas de uma vez pelo compute_metrics
+# sobre o cubo por entregador (máximo dos máximos, mínimo dos mínimos)
+OVERALL_METRICS = [
+    # maior/menor idade dos entregadores
+    Metric('maior_idade', 'Delivery_person_Age_max', 'max'),
+    Metric('menor_idade', 'Delivery_person_Age_min', 'min'),
+    # melhor/pior condição dos veículos
+    Metric('melhor_condicao', 'Vehicle_condition_max', 'max'),
+    Metric('pior_condicao', 'Vehicle_condition_min', 'min'),
+]
+
+def avg_ratings_per_deliver(couriers):
+    # a avaliação média por entregador: soma das avaliações / pedidos, somando as células do cubo
+    # (com o cubo filtrado grande, o groupby é dividido por entregador entre processos, ver curry.parallel)
+    df_aux = sharded_groupby(couriers, 'Delivery_person_ID', ['Delivery_person_ID'],
+                             {'Delivery_person_Ratings_sum': ('Delivery_person_Ratings_sum', 'sum'),
+                              'count': ('count', 'sum')})
+    df_aux['Delivery_person_Ratings'] = df_aux['Delivery_person_Ratings_sum'] / df_aux['count']
+    return df_aux[['Delivery_person_ID', 'Delivery_person_Ratings']]
+
+def avg_std_ratings(cube, by):
+    # a avaliação média e o desvio padrão por tipo de tráfego / condição climática.
+    df_aux = cube_stats(cube, by, 'Delivery_person_Ratings')
+    df_aux = (df_aux[[by, 'mean', 'std']]
+              .rename(columns={'mean': 'delivery_mean', 'std': 'delivery_std'}))
+    return df_aux
+
+def _top_k_positions(values, k, largest):
+    # seleção parcial (argpartition, O(n)) e ordenação só dos k escolhidos
+    if len(values) > k:
+        part = np.argpartition(values, -k if largest else k - 1)
+        part = part[-k:] if largest else part[:k]
+    else:
+        part = np.arange(len(values))
+    order = np.argsort(values[part], kind='stable')
+    return part[order[::-1]] if largest else part[order]
+
+def top_delivers(couriers, n=10):
+    """ Esta função calcula os N entregadores mais rápidos e os N mais lentos de cada cidade
+
+        O tempo de cada entregador é o maior tempo de entrega dele na cidade
+        (máximo dos máximos das células do cubo por entregador). As cidades são
+        as presentes nos dados (não uma lista fixa) e os dois rankings saem do
+        mesmo groupby, com seleção parcial em vez de ordenar tudo. Com o cubo
+        filtrado grande, o groupby é dividido por entregador entre processos
+        (ver curry.parallel).
+
+        Input:
+            - couriers: cubo por entregador (filtrado, ver curry.cube)
+            - n: quantidade de entregadores por cidade
+        Output: (Dataframe dos mais rápidos, Dataframe dos mais lentos)
+    """
+    df2 = sharded_groupby(couriers, 'Delivery_person_ID', ['Delivery_person_ID', 'City'],
+                          {'Time_taken(min)': ('Time_taken(min)_max', 'max')})
+    values = df2['Time_taken(min)'].to_numpy()
+
+    fastest, slowest = [], []
+    for _, positions in sorted(df2.groupby('City', observed=True).indices.items()):
+        fastest.append(positions[_top_k_positions(values[positions], n, largest=False)])
+        slowest.append(positions[_top_k_positions(values[positions], n, largest=True)])
+
+    def pick(parts):
+        rows = np.concatenate(parts) if parts else np.array([], dtype=np.intp)
+        return df2.iloc[rows].reset_index(drop=True)
+
+    return pick(fastest), pick(slowest)
+
+def widgets(filtros, top_n=DEFAULT_TOP_N):
+    """ Esta função lista os cálculos da página para um estado dos filtros
+
+        Input: Filtros (ver curry.filters) e quantidade de entregadores no Top
+        Output: dict nome do widget -> função sem argumentos
+    """
+    return {
+        'entregadores_overall_metrics': lambda: compute_metrics(filtros.entregadores(), OVERALL_METRICS),
+        'avg_ratings_per_deliver': lambda: avg_ratings_per_deliver(filtros.entregadores()),
+        # médias e desvios do período: totais do período (diferença de prefixos)
+        'avg_std_by_traffic': lambda: avg_std_ratings(filtros.totais(), 'Road_traffic_density'),
+        'avg_std_by_weather': lambda: avg_std_ratings(filtros.totais(), 'Weatherconditions'),
+        # mais rápidos e mais lentos saem do mesmo cálculo; N faz parte da chave
+        'top_delivers/%d' % top_n: lambda: top_delivers(filtros.entregadores(), top_n),
+    }
@@ -0,0 +1,69 @@
+""" Execução em paralelo dos cálculos independentes de uma página
+
+    Os widgets de uma página não dependem uns dos outros: todos os cálculos são
+    disparados juntos em um pool de threads e a página só renderiza depois. O
+    tempo da página fica próximo do widget mais lento, e não da soma de todos.
+
+    Threads (e não processos) porque os cálculos leem o mesmo dataframe em
+    memória e boa parte do trabalho do pandas/numpy libera o GIL; com processos
+    o dataframe teria que ser serializado a cada chamada.
+"""
+# bibliotecas
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# um único pool por processo, compartilhado pelas sessões
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='curry')
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def run_parallel(tasks):
+    """ Esta função executa as tarefas em paralelo e espera todas terminarem
+
+        Input: dict nome -> função sem argumentos
+        Output: dict nome -> resultado (a primeira exceção é propagada)
+    """
+    futures = {name: _pool.submit(func) for name, func in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+def once(func):
+    """ Decorator: a função (sem argumentos) é calculada uma única vez, mesmo com
+        várias threads chamando ao mesmo tempo; as demais esperam o resultado.
+    """
+    lock = threading.Lock()
+    result = []
+
+    def wrapper():
+        if not result:
+            with lock:
+                if not result:
+                    result.append(func())
+        return result[0]
+
+    return wrapper
+
+def once_per_key(func):
+    """ Decorator: como o lru_cache(maxsize=1) para funções de um argumento (a
+        versão dos dados), mas com lock: se várias threads pedem a mesma chave
+        ao mesmo tempo (warm-up, widgets em paralelo, a própria página), só uma
+        calcula e as demais esperam o resultado. Guarda apenas a última chave.
+    """
+    lock = threading.Lock()
+    last = [None]  # (chave, resultado)
+
+    def wrapper(key):
+        entry = last[0]
+        if entry is None or entry[0] != key:
+            with lock:
+                entry = last[0]
+                if entry is None or entry[0] != key:
+                    entry = (key, func(key))
+                    last[0] = entry
+        return entry[1]
+
+    return wrapper
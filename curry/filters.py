@@ -0,0 +1,124 @@
+""" Estado dos filtros da barra lateral e os dados filtrados das páginas
+
+    Filtros reúne o período [início, fim) e os níveis de trânsito escolhidos e
+    entrega, sob demanda, as linhas, o cubo, os totais do período e a tabela
+    semanal já filtrados.
+    Cada um é calculado uma única vez por estado, mesmo com vários widgets
+    pedindo ao mesmo tempo, e só se algum widget não estiver no cache.
+
+    Os limites do período saem dos acumulados por dia do cubo diário
+    (date_bounds, ver curry.dateindex.DayTotals); os
+    valores padrão são os mesmos da barra lateral: é com eles que o warm-up
+    (ver curry.warmup) pré-calcula a página de entrada.
+"""
+# bibliotecas
+import datetime
+from functools import partial
+
+from curry.cube import filter_cube
+from curry.data import (DATA_PATH, data_version, load_couriers, load_cube, load_data, load_date_index,
+                        load_day_totals, load_weekly, out_of_core)
+from curry.executor import once, run_parallel
+from curry.memo import cached
+from curry.profiling import stage
+
+# fim padrão do período e níveis de trânsito da barra lateral
+DEFAULT_DATE = datetime.datetime(2022, 4, 13)
+TRAFFIC_LEVELS = ['Low', 'Medium', 'High', 'Jam']
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def date_bounds(path=DATA_PATH):
+    """ Esta função devolve os limites do seletor de período a partir dos dias do cubo diário
+
+        Os dias vêm dos acumulados por dia (ver curry.dateindex.DayTotals), que
+        cobrem o dataset inteiro também no modo out-of-core (ver curry.chunked),
+        em que as linhas em memória são só uma amostra. O fim do período não
+        entra no filtro (Order_Date < fim): o limite superior é o dia seguinte
+        ao último pedido.
+
+        Input: caminho do dataset
+        Output: (primeiro dia, dia seguinte ao último) como datetime
+    """
+    first, last = load_day_totals(path).bounds()
+    if first is None:
+        return DEFAULT_DATE, DEFAULT_DATE
+    return first, last + datetime.timedelta(days=1)
+
+def default_range(path=DATA_PATH):
+    """ Período padrão: do primeiro dia do dataset até DEFAULT_DATE (limitado ao dataset) """
+    date_min, date_max = date_bounds(path)
+    return date_min, min(max(DEFAULT_DATE, date_min), date_max)
+
+class Filtros:
+    """ Estado dos filtros e os dados filtrados correspondentes
+
+        key:      chave do cache de resultados (versão do dataset, início, fim, trânsito)
+        linhas(): linhas com início <= Order_Date < fim e trânsito entre os escolhidos
+        cubo():   mesmos filtros aplicados ao cubo diário
+        totais(): células do cubo do período somadas por combinação das dimensões (sem Order_Date)
+        entregadores(): mesmos filtros aplicados ao cubo por entregador
+        semanas(): tabela semanal (ver WeeklyRollup.between)
+    """
+
+    def __init__(self, date_range=None, traffic_options=TRAFFIC_LEVELS, path=DATA_PATH):
+        start, end = default_range(path) if date_range is None else date_range
+        self.start = start
+        self.end = end
+        self.traffic_options = list(traffic_options)
+        self.path = path
+        self.key = (data_version(path), start, end, tuple(traffic_options))
+
+        # Filtros de data (duas buscas binárias no índice de datas ou nos dias do cubo) e de trânsito;
+        # com todos os níveis de trânsito escolhidos as linhas não são copiadas
+        self.linhas = once(self._linhas)
+        self.cubo = once(self._cubo)
+        self.totais = once(self._totais)
+        self.entregadores = once(self._entregadores)
+        self.semanas = once(self._semanas)
+
+    def _linhas(self):
+        df1, date_index = load_data(self.path), load_date_index(self.path)
+        with stage('filtro/linhas'):
+            return date_index.select(df1, self.start, self.end, self.traffic_options)
+
+    def _cubo(self):
+        cube = load_cube(self.path)
+        with stage('filtro/cubo'):
+            return filter_cube(cube, self.start, self.end, self.traffic_options)
+
+    def _totais(self):
+        # diferença de dois prefixos dos acumulados por dia: não depende do tamanho do período
+        totals = load_day_totals(self.path)
+        with stage('filtro/totais'):
+            return totals.between(self.start, self.end, self.traffic_options)
+
+    def _entregadores(self):
+        couriers = load_couriers(self.path)
+        with stage('filtro/entregadores'):
+            return filter_cube(couriers, self.start, self.end, self.traffic_options)
+
+    def _semanas(self):
+        # semanas inteiras do agregado semanal + semanas incompletas das pontas a partir das linhas.
+        # No modo out-of-core as linhas em memória são só uma amostra: as pontas saem
+        # do cubo por entregador, que cobre o dataset inteiro como o agregado semanal
+        weekly = load_weekly(self.path)
+        if out_of_core(self.path):
+            couriers = load_couriers(self.path)
+            rows, weight = partial(filter_cube, couriers, traffic_options=self.traffic_options), 'count'
+        else:
+            rows, weight = partial(load_date_index(self.path).between, load_data(self.path)), None
+        with stage('filtro/semanas'):
+            return weekly.between(rows, self.start, self.end, self.traffic_options, weight)
+
+def compute_widgets(filtros, calculos):
+    """ Esta função calcula os widgets de uma página em paralelo, passando pelo cache
+
+        Input:
+            - filtros: Filtros
+            - calculos: dict nome do widget -> função sem argumentos
+        Output: dict nome do widget -> resultado
+    """
+    return run_parallel({nome: partial(cached, nome, filtros.key, calculo) for nome, calculo in calculos.items()})
@@ -0,0 +1,19 @@
+# bibliotecas
+import numpy as np
+
+# raio médio da Terra em km (o mesmo usado pelo pacote haversine)
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """ Esta função calcula a distância de círculo máximo (haversine) em km
+
+        Trabalha sobre arrays inteiros de uma vez, em vez de uma chamada por linha.
+
+        Input: arrays de latitude/longitude de origem e destino (graus)
+        Output: array com as distâncias em km
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon * 0.5) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
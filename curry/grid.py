@@ -0,0 +1,168 @@
+""" Índice espacial em grade sobre as coordenadas dos restaurantes e das entregas
+
+    O mapa é dividido em células de CELL_DEG graus (~11 km), no estilo de um
+    geohash: cada coordenada vira o número inteiro da sua célula. O índice é
+    construído uma vez sobre o dataset limpo e guarda:
+      - um cubo (dia, trânsito, célula) dos locais de entrega e outro dos
+        restaurantes, com a quantidade de pedidos e a soma e a soma dos
+        quadrados do tempo de entrega: densidade e tempo médio por célula sob
+        os filtros da barra lateral saem da soma das células (como no cubo
+        diário, ver curry.cube);
+      - as linhas agrupadas pela célula do local de entrega: "pedidos a até
+        R km deste restaurante" só calcula a haversine das linhas das células
+        que cobrem o círculo, e não do dataset inteiro.
+"""
+# bibliotecas
+import numpy as np
+import pandas as pd
+
+from curry.cube import cube_stats, filter_cube, merge_cubes
+from curry.geo import EARTH_RADIUS_KM, haversine_km
+
+# tamanho da célula em graus (~11 km de latitude)
+CELL_DEG = 0.1
+
+# km por grau de latitude (e de longitude no equador)
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180
+
+# pontos indexados: nome -> (coluna de latitude, coluna de longitude)
+POINTS = {
+    'entrega': ('Delivery_location_latitude', 'Delivery_location_longitude'),
+    'restaurante': ('Restaurant_latitude', 'Restaurant_longitude'),
+}
+
+# dimensões dos cubos da grade
+GRID_DIMENSIONS = ['Order_Date', 'Road_traffic_density', 'cell']
+
+# restaurantes com mais pedidos guardados para o seletor da página
+TOP_RESTAURANTS = 50
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def _n_cols(cell_deg):
+    return int(round(360 / cell_deg))
+
+def cell_ids(lat, lon, cell_deg=CELL_DEG):
+    """ Número da célula de cada coordenada: linha * colunas + coluna """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    n_cols = _n_cols(cell_deg)
+    row = np.floor((lat + 90) / cell_deg).astype(np.int64)
+    col = np.floor((lon + 180) / cell_deg).astype(np.int64) % n_cols
+    return row * n_cols + col
+
+def cell_centers(cells, cell_deg=CELL_DEG):
+    """ Latitude e longitude do centro de cada célula """
+    n_cols = _n_cols(cell_deg)
+    cells = np.asarray(cells, dtype=np.int64)
+    return (cells // n_cols + 0.5) * cell_deg - 90, (cells % n_cols + 0.5) * cell_deg - 180
+
+def _cell_cube(df1, cells):
+    # (dia, trânsito, célula) -> quantidade, soma e soma dos quadrados do tempo de entrega
+    time_taken = df1['Time_taken(min)'].to_numpy(dtype=np.float64)
+    df_aux = df1[['Order_Date', 'Road_traffic_density']].assign(**{'cell': cells,
+                                                                   'Time_taken(min)': time_taken,
+                                                                   'Time_taken(min)_sq': time_taken ** 2})
+    return df_aux.groupby(GRID_DIMENSIONS, observed=True)\
+                 .agg(**{'count': ('Time_taken(min)', 'size'),
+                         'Time_taken(min)_sum': ('Time_taken(min)', 'sum'),
+                         'Time_taken(min)_sumsq': ('Time_taken(min)_sq', 'sum')}).reset_index()
+
+class GridIndex:
+    """ Grade espacial de um dataframe ordenado por Order_Date
+
+        cubes:       dict ponto ('entrega'/'restaurante') -> cubo (dia, trânsito, célula)
+        cells:       células com entregas, em ordem
+        starts:      início de cada célula em order (starts[-1] = total de linhas)
+        order:       posições das linhas no dataframe, agrupadas por célula de entrega
+                     (None sem o índice das linhas: with_rows=False ou depois de um merge)
+        restaurants: restaurantes (latitude, longitude) com mais pedidos
+    """
+
+    def __init__(self, df1, cell_deg=CELL_DEG, with_rows=True):
+        self.cell_deg = cell_deg
+        self.cubes = {}
+        for name, (lat, lon) in POINTS.items():
+            self.cubes[name] = _cell_cube(df1, cell_ids(df1[lat], df1[lon], cell_deg))
+
+        lat, lon = POINTS['restaurante']
+        self.restaurant_counts = df1.groupby([lat, lon]).size()
+        self._top_restaurants()
+
+        self.order = None
+        if with_rows:
+            lat, lon = POINTS['entrega']
+            self.lat = df1[lat].to_numpy()
+            self.lon = df1[lon].to_numpy()
+            cells = cell_ids(self.lat, self.lon, cell_deg)
+            self.order = np.argsort(cells, kind='stable')
+            self.cells, first = np.unique(cells[self.order], return_index=True)
+            self.starts = np.append(first, len(cells))
+
+    def _top_restaurants(self):
+        self.restaurants = self.restaurant_counts.rename('count').nlargest(TOP_RESTAURANTS).reset_index()
+
+    def merge(self, *others):
+        """ Junta à grade os cubos e os restaurantes de outros lotes (ver curry.chunked)
+
+            As posições das linhas não valem entre lotes: depois do merge a
+            consulta por raio (within) fica indisponível.
+        """
+        parts = [self, *others]
+        for name in self.cubes:
+            self.cubes[name] = merge_cubes([p.cubes[name] for p in parts], GRID_DIMENSIONS)
+        counts = pd.concat([p.restaurant_counts for p in parts])
+        self.restaurant_counts = counts.groupby(level=list(range(counts.index.nlevels))).sum().astype(np.int64)
+        self._top_restaurants()
+        self.order = None
+        return self
+
+    def cell_stats(self, points, start, end, traffic_options):
+        """ Esta função calcula pedidos e tempo de entrega por célula sob os filtros da barra lateral
+
+            Input:
+                - points: 'entrega' ou 'restaurante'
+                - start, end, traffic_options: filtros (ver curry.filters)
+            Output: Dataframe com cell, latitude, longitude (centro), count, mean e std
+        """
+        cube = filter_cube(self.cubes[points], start, end, traffic_options)
+        df_aux = cube_stats(cube, 'cell', 'Time_taken(min)')
+        df_aux['latitude'], df_aux['longitude'] = cell_centers(df_aux['cell'], self.cell_deg)
+        return df_aux
+
+    def _candidate_cells(self, lat, lon, radius_km):
+        # células da caixa que envolve o círculo; em longitude, a maior abertura
+        # do círculo na esfera (mais larga longe do equador)
+        dlat = radius_km / KM_PER_DEG
+        ratio = np.sin(radius_km / EARTH_RADIUS_KM) / max(np.cos(np.radians(lat)), 1e-12)
+        dlon = np.degrees(np.arcsin(ratio)) if ratio < 1 else 180.0
+        n_cols = _n_cols(self.cell_deg)
+        rows = np.arange(np.floor((max(lat - dlat, -90) + 90) / self.cell_deg),
+                         np.floor((min(lat + dlat, 90) + 90) / self.cell_deg) + 1, dtype=np.int64)
+        cols = np.arange(np.floor((lon - dlon + 180) / self.cell_deg),
+                         np.floor((lon + dlon + 180) / self.cell_deg) + 1, dtype=np.int64)
+        cols = np.unique(cols % n_cols)
+        return np.add.outer(rows * n_cols, cols).ravel()
+
+    def within(self, lat, lon, radius_km):
+        """ Esta função encontra os pedidos com local de entrega a até radius_km do ponto
+
+            A haversine só é calculada para as linhas das células candidatas.
+
+            Input: latitude, longitude (graus) e raio em km
+            Output: array ordenado com as posições das linhas no dataframe (None sem o índice das linhas)
+        """
+        if self.order is None:
+            return None
+        keys = self._candidate_cells(lat, lon, radius_km)
+        found = np.searchsorted(self.cells, keys)
+        hit = found < len(self.cells)
+        hit[hit] = self.cells[found[hit]] == keys[hit]
+        found = found[hit]
+        if not len(found):
+            return np.array([], dtype=np.int64)
+        candidates = np.concatenate([self.order[self.starts[p]:self.starts[p + 1]] for p in found])
+        distance = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        return np.sort(candidates[distance <= radius_km])
@@ -0,0 +1,68 @@
+""" Mapas com todos os pontos de entrega
+
+    Em vez de um folium.Marker por linha, os pontos vão para o mapa de uma vez
+    como arrays: FastMarkerCluster (agrupamento feito no navegador) ou HeatMap.
+    O HTML gerado é o que deve ir para o cache (ver curry.memo).
+
+    O folium (~0,5 s de import) só é importado ao montar um mapa, e não ao
+    abrir as páginas.
+"""
+# bibliotecas
+import numpy as np
+
+from curry.profiling import stage
+
+# acima disso os pontos são amostrados para manter o HTML em um tamanho razoável
+MAX_POINTS = 200_000
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def _delivery_points(df1, max_points=MAX_POINTS):
+    points = df1[['Delivery_location_latitude', 'Delivery_location_longitude']].to_numpy(dtype=np.float64)
+    if len(points) > max_points:
+        rng = np.random.default_rng(0)
+        points = points[rng.choice(len(points), max_points, replace=False)]
+    # 5 casas decimais (~1 m) reduzem bastante o tamanho do HTML
+    return np.round(points, 5)
+
+def _fit(fmap, points):
+    if len(points):
+        fmap.fit_bounds([points.min(axis=0).tolist(), points.max(axis=0).tolist()])
+    return fmap
+
+def cluster_map(df1):
+    """ Esta função monta um mapa com todos os locais de entrega agrupados em clusters
+
+        Input: Dataframe
+        Output: folium.Map
+    """
+    import folium
+    from folium.plugins import FastMarkerCluster
+
+    points = _delivery_points(df1)
+    fmap = folium.Map()
+    FastMarkerCluster(data=points.tolist()).add_to(fmap)
+    return _fit(fmap, points)
+
+def heat_map(df1):
+    """ Esta função monta um mapa de calor dos locais de entrega
+
+        Input: Dataframe
+        Output: folium.Map
+    """
+    import folium
+    from folium.plugins import HeatMap
+
+    points = _delivery_points(df1)
+    fmap = folium.Map()
+    HeatMap(points.tolist(), radius=8, blur=10).add_to(fmap)
+    return _fit(fmap, points)
+
+def map_html(fmap):
+    """ Gera o HTML do mapa (o mesmo que o folium_static envia ao navegador) """
+    import folium
+
+    with stage('map_html'):
+        return folium.Figure().add_child(fmap).render()
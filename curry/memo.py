@@ -0,0 +1,121 @@
+""" Cache de resultados dos widgets, compartilhado entre as sessões
+
+    Cada resultado (figura, tabela ou métrica) é guardado com a chave
+    (widget, estado dos filtros), e o estado dos filtros inclui a versão do
+    dataset. Quando a mesma combinação de filtros volta (outra sessão, troca
+    de aba, rerun), o resultado sai do cache sem tocar no pandas. Figuras
+    ficam como o Figure já montado e não devem ser alteradas.
+
+    Remoção por LRU, por tempo de vida (TTL) e por limite de memória.
+"""
+# bibliotecas
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from curry.profiling import stage
+
+MAX_ENTRIES = 512
+TTL_SECONDS = 15 * 60
+MAX_BYTES = 256 * 1024 * 1024
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def _sizeof(value):
+    # estimativa do tamanho em memória do resultado
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+class ResultCache:
+    """ Cache LRU com TTL e limite de memória, seguro para várias threads
+
+        Os contadores (hits, misses, evictions) ficam disponíveis em stats().
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # chave -> (valor, tamanho, expira_em)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get_or_compute(self, key, compute):
+        """ Devolve o valor da chave; se não estiver no cache (ou expirou), calcula e guarda
+
+            O cálculo roda fora do lock: sessões diferentes não esperam umas pelas outras.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+
+        value = compute()
+        size = _sizeof(value)
+
+        with self._lock:
+            if size > self.max_bytes:
+                return value
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """ Contadores do cache: hits, misses, evictions, entradas e bytes ocupados """
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': self.hits / total if total else 0.0,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+# instância única por processo, compartilhada por todas as sessões
+widget_cache = ResultCache()
+
+def cached(widget, filtros, compute):
+    """ Esta função busca o resultado de um widget no cache compartilhado
+
+        Input:
+            - widget: nome do widget
+            - filtros: tupla com o estado dos filtros (incluindo a versão do dataset)
+            - compute: função sem argumentos que calcula o resultado em caso de miss
+        Output: resultado do widget
+    """
+    return widget_cache.get_or_compute((widget, filtros), lambda: _compute(widget, compute))
+
+def _compute(widget, compute):
+    # miss no cache: cálculo medido por widget (ver curry.profiling)
+    with stage('widget/' + widget):
+        return compute()
@@ -0,0 +1,92 @@
+""" Motor das linhas de métricas gerais ("Overall Metrics")
+
+    Cada métrica é descrita por um Metric(nome, coluna, operação, filtro). O
+    motor junta as métricas que precisam do mesmo agrupamento e calcula todas
+    de uma vez: uma única agregação para as métricas sem filtro e um único
+    groupby por coluna de filtro (ex.: Festival Yes/No saem do mesmo groupby).
+
+    Sobre o cubo diário (ver curry.cube) a média e o desvio padrão de uma
+    medida saem das colunas count, <medida>_sum e <medida>_sumsq: o mesmo
+    agrupamento soma essas colunas e as métricas são calculadas das somas.
+"""
+# bibliotecas
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+# where: None ou (coluna, valor) -> a métrica considera só as linhas com coluna == valor
+Metric = namedtuple('Metric', ['name', 'column', 'op', 'where'], defaults=[None])
+
+# operações que o cubo responde pelas somas (quantidade, soma e soma dos quadrados)
+MOMENT_OPS = ('mean', 'std')
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def _round(value, decimals):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), decimals)
+    return value.item() if isinstance(value, np.generic) else value
+
+def _sums(df1, m):
+    # colunas de somas do cubo para a métrica, ou None se ela é calculada na própria coluna
+    if m.op not in MOMENT_OPS or m.column in df1.columns or m.column + '_sum' not in df1.columns:
+        return None
+    return ['count', m.column + '_sum', m.column + '_sumsq']
+
+def _moment(n, total, sumsq, op):
+    # média / desvio padrão amostral (ddof=1) a partir das somas, como no cube_stats
+    n = float(n)
+    if op == 'mean':
+        return total / n if n else None
+    if n < 2:
+        return None
+    return float(np.sqrt(max(sumsq - total ** 2 / n, 0.0) / (n - 1)))
+
+def compute_metrics(df1, specs, decimals=2):
+    """ Esta função calcula todas as métricas de uma linha de uma vez
+
+        Input:
+            - df1: Dataframe (já filtrado): linhas, cubo ou totais do período
+            - specs: lista de Metric
+            - decimals: casas decimais dos valores float
+        Output: dict nome -> valor (None quando o grupo não tem linhas)
+    """
+    # agrupa as operações por "chave de agrupamento" (None = sem filtro) e por coluna
+    plans = defaultdict(lambda: defaultdict(set))
+    for m in specs:
+        by = m.where[0] if m.where else None
+        sums = _sums(df1, m)
+        for col in sums or [m.column]:
+            plans[by][col].add(m.op if sums is None else 'sum')
+
+    results = {}
+    for by, ops in plans.items():
+        ops = {col: sorted(col_ops) for col, col_ops in ops.items()}
+        if by is None:
+            # uma Series por coluna, para manter o tipo (ex.: idade inteira)
+            results[None] = {col: df1[col].agg(col_ops) for col, col_ops in ops.items()}
+        else:
+            results[by] = df1.groupby(by, observed=True).agg(ops)
+
+    metrics = {}
+    for m in specs:
+        if m.where is None:
+            values = {col: results[None][col] for col in plans[None]}
+        else:
+            by, key = m.where
+            table = results[by]
+            if key not in table.index:
+                metrics[m.name] = None
+                continue
+            values = {col: table.loc[key, col] for col in plans[by]}
+        sums = _sums(df1, m)
+        if sums is None:
+            value = values[m.column][m.op]
+        else:
+            value = _moment(*(values[col]['sum'] for col in sums), m.op)
+        metrics[m.name] = _round(value, decimals)
+    return metrics
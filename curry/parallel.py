@@ -0,0 +1,179 @@
+""" Agregação em vários processos para os groupbys por entregador
+
+    O cubo por entregador (ver curry.cube) e os groupbys da Visão Entregadores
+    sobre ele (avaliação média e maior tempo por entregador, a cada mudança
+    dos filtros) agrupam pelo Delivery_person_ID: crescem com a quantidade de
+    entregadores e, no pandas, rodam em um núcleo só. Aqui as linhas são
+    divididas por hash do Delivery_person_ID em um shard por processo:
+      - as colunas usadas vão uma única vez para blocos de memória compartilhada
+        (shared_memory) como arrays numpy (categorias viram os códigos, datas
+        viram int64); nenhum dataframe é serializado para os processos;
+      - cada processo lê só as posições das linhas do seu shard e agrega;
+      - como cada entregador cai em um único shard, os resultados dos
+        processos não se sobrepõem: basta concatenar e ordenar.
+
+    Abaixo de PARALLEL_MIN_ROWS linhas (ou com um processo só) o groupby roda
+    no próprio processo: o custo de iniciar o pool e copiar as colunas não
+    compensa. O número de processos vem de CURRY_WORKERS (padrão: núcleos da
+    máquina, até 8).
+"""
+# bibliotecas
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from curry.cube import COURIER_AGGS, COURIER_DIMENSIONS
+
+WORKERS = int(os.environ.get('CURRY_WORKERS', min(8, os.cpu_count() or 1)))
+
+# abaixo disso o groupby roda no próprio processo
+PARALLEL_MIN_ROWS = 1_000_000
+
+# um pool por quantidade de processos, criado na primeira chamada. 'spawn' em vez
+# de 'fork': o processo do Streamlit tem várias threads, e fork com threads não é seguro
+_pools = {}
+_pools_lock = threading.Lock()
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def _pool(workers):
+    # widgets em threads diferentes podem pedir o pool ao mesmo tempo
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+        return _pools[workers]
+
+def start_pool(workers=None):
+    """ Inicia os processos do pool antes do primeiro uso (cada um importa numpy e pandas) """
+    workers = WORKERS if workers is None else workers
+    pool = _pool(workers)
+    for future in [pool.submit(os.getpid) for _ in range(workers)]:
+        future.result()
+    return pool
+
+def shard_of(codes, n_shards):
+    """ Shard de cada linha: hash multiplicativo (Fibonacci) do código do entregador """
+    hashed = codes.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return ((hashed >> np.uint64(32)) % np.uint64(n_shards)).astype(np.int16)
+
+def _encode(column):
+    # coluna do pandas -> (array numpy, dtype para decodificar)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.dtype
+    if pd.api.types.is_datetime64_dtype(column.dtype):
+        return column.to_numpy().view(np.int64), column.dtype
+    return column.to_numpy(), None
+
+def _decode(values, dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.Categorical.from_codes(values, dtype=dtype)
+    if dtype is not None:
+        return values.view(dtype)
+    return values
+
+class SharedColumns:
+    """ Arrays numpy copiados para blocos de memória compartilhada
+
+        spec: dict nome -> (nome do bloco, dtype, shape), o que vai para os
+        processos no lugar dos dados. Use com `with`: os blocos são liberados
+        na saída.
+    """
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.spec = {}
+        try:
+            for name, values in arrays.items():
+                shm = SharedMemory(create=True, size=max(values.nbytes, 1))
+                self.blocks.append(shm)
+                np.ndarray(values.shape, values.dtype, buffer=shm.buf)[:] = values
+                self.spec[name] = (shm.name, values.dtype.str, values.shape)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def _aggregate_shard(spec, start, stop, by, aggs, categorical):
+    # executado em cada processo: lê as linhas do shard nos blocos compartilhados e agrega
+    blocks = {name: SharedMemory(name=block) for name, (block, _, _) in spec.items()}
+    try:
+        views = {name: np.ndarray(shape, np.dtype(dtype), buffer=blocks[name].buf)
+                 for name, (_, dtype, shape) in spec.items()}
+        positions = views.pop('_order')[start:stop]
+        # a indexação copia: depois disso os blocos podem ser fechados
+        df_aux = pd.DataFrame({name: values[positions] for name, values in views.items()})
+        del views, positions
+    finally:
+        for shm in blocks.values():
+            shm.close()
+    # código -1 = categoria ausente, ignorada como no groupby com observed=True
+    for col in categorical:
+        df_aux = df_aux.loc[df_aux[col].to_numpy() >= 0]
+    return df_aux.groupby(by).agg(**aggs).reset_index()
+
+def sharded_groupby(df1, key, by, aggs, workers=None):
+    """ Esta função calcula df1.groupby(by, observed=True).agg(**aggs) em vários processos
+
+        As linhas são divididas por hash da coluna key (categórica e presente em
+        by), então cada grupo é agregado inteiro em um único processo.
+
+        Input:
+            - df1: Dataframe limpo
+            - key: coluna usada para dividir as linhas
+            - by: colunas do groupby
+            - aggs: dict nome -> (coluna, operação), como no agg do pandas
+            - workers: quantidade de processos (None = WORKERS)
+        Output: Dataframe igual ao do groupby no próprio processo
+    """
+    workers = WORKERS if workers is None else workers
+    if workers <= 1 or len(df1) < PARALLEL_MIN_ROWS:
+        return df1.groupby(by, observed=True).agg(**aggs).reset_index()
+
+    columns = list(dict.fromkeys(by + [col for col, _ in aggs.values()]))
+    arrays, dtypes = {}, {}
+    for col in columns:
+        arrays[col], dtypes[col] = _encode(df1[col])
+    categorical = [col for col in by if isinstance(dtypes[col], pd.CategoricalDtype)]
+
+    # posições das linhas agrupadas por shard (argsort estável de inteiros pequenos: radix sort)
+    shards = shard_of(arrays[key], workers)
+    arrays['_order'] = np.argsort(shards, kind='stable')
+    starts = np.searchsorted(shards[arrays['_order']], np.arange(workers + 1))
+
+    with SharedColumns(arrays) as shared:
+        futures = [_pool(workers).submit(_aggregate_shard, shared.spec, int(starts[k]), int(starts[k + 1]),
+                                         by, aggs, categorical)
+                   for k in range(workers)]
+        parts = [future.result() for future in futures]
+    # shards vazios saem sem os dtypes das colunas e atrapalhariam o concat
+    parts = [part for part in parts if len(part)] or parts[:1]
+
+    # os shards não se sobrepõem: junta e ordena como o groupby (códigos na ordem das categorias)
+    df_aux = pd.concat(parts, ignore_index=True).sort_values(by, kind='stable', ignore_index=True)
+    for col in by:
+        df_aux[col] = _decode(df_aux[col].to_numpy(), dtypes[col])
+    return df_aux
+
+def build_courier_cube(df1, workers=None):
+    """ curry.cube.build_courier_cube dividido por Delivery_person_ID entre processos """
+    aggs = {name: (col, op) for name, (col, op, _) in COURIER_AGGS.items()}
+    return sharded_groupby(df1, 'Delivery_person_ID', COURIER_DIMENSIONS, aggs, workers)
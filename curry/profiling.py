@@ -0,0 +1,176 @@
+""" Instrumentação das etapas de cada execução das páginas
+
+    Ligada pela variável de ambiente CURRY_PROFILE=1. Cada etapa nomeada
+    (leitura do csv, clean_code, filtros, cálculo de cada widget,
+    HTML dos mapas, renderização da página...) registra:
+      - o tempo da etapa em ms;
+      - a variação de memória alocada (tracemalloc) e o pico acima do início da
+        etapa. O pico do tracemalloc é um só por processo e é zerado no início
+        de cada página: em etapas que rodam em paralelo ele inclui as vizinhas.
+
+    Cada registro vai para um arquivo JSONL (CURRY_PROFILE_PATH, padrão
+    data/profile.jsonl) e para um histórico em memória que alimenta o painel de
+    debug escondido das páginas (abrir a página com ?debug=1). Resumo de p50/p95
+    por etapa a partir do arquivo:
+        python -m curry.profiling --path data/profile.jsonl --freq 1h
+
+    Desligada, stage() devolve sempre o mesmo objeto que não faz nada: o custo
+    é uma chamada de função por etapa.
+"""
+# bibliotecas
+import argparse
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import pandas as pd
+
+ENABLED = os.environ.get('CURRY_PROFILE', '') not in ('', '0')
+PROFILE_PATH = os.environ.get('CURRY_PROFILE_PATH', 'data/profile.jsonl')
+
+# registros mantidos em memória por etapa (para o painel de debug)
+HISTORY = 500
+
+_lock = threading.Lock()
+_history = {}  # etapa -> deque de (ms, pico em bytes)
+
+if ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def record(name, seconds, mem_delta, peak_delta, path=PROFILE_PATH):
+    """ Guarda o registro de uma etapa no histórico em memória e no arquivo JSONL """
+    entry = {'ts': time.time(), 'stage': name, 'ms': round(seconds * 1000, 3),
+             'mem_delta_kb': round(mem_delta / 1024, 1), 'peak_kb': round(peak_delta / 1024, 1)}
+    with _lock:
+        _history.setdefault(name, deque(maxlen=HISTORY)).append((entry['ms'], peak_delta))
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+class _Stage:
+    """ Mede uma etapa: use como `with stage(nome):` ou com start()/stop() """
+
+    __slots__ = ('name', 'reset_peak', '_start', '_memory')
+
+    def __init__(self, name, reset_peak=False):
+        self.name = name
+        self.reset_peak = reset_peak
+
+    def start(self):
+        if self.reset_peak:
+            tracemalloc.reset_peak()
+        self._memory = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        seconds = time.perf_counter() - self._start
+        current, peak = tracemalloc.get_traced_memory()
+        record(self.name, seconds, current - self._memory, max(0, peak - self._memory))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+class _NullStage:
+    """ Etapa que não mede nada (instrumentação desligada) """
+
+    __slots__ = ()
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def stage(name):
+    """ Etapa nomeada a medir (não faz nada com a instrumentação desligada) """
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage(name)
+
+def page_stage(page):
+    """ Etapa da página inteira; zera o pico de memória do tracemalloc no início """
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage('pagina/' + page, reset_peak=True)
+
+def summarize(df_aux):
+    """ Esta função resume os registros por etapa
+
+        Input: Dataframe com as colunas stage, ms e peak_kb (mais as colunas de agrupamento extras)
+        Output: Dataframe com execuções, p50, p95 e máximo de ms e pico máximo de memória por etapa
+    """
+    keys = [c for c in df_aux.columns if c not in ('stage', 'ms', 'peak_kb')] + ['stage']
+    grouped = df_aux.groupby(keys)
+    return pd.DataFrame({'runs': grouped['ms'].size(),
+                         'p50_ms': grouped['ms'].quantile(0.5),
+                         'p95_ms': grouped['ms'].quantile(0.95),
+                         'max_ms': grouped['ms'].max(),
+                         'peak_mb': grouped['peak_kb'].max() / 1024}).round(2).reset_index()
+
+def summary():
+    """ Resumo por etapa do histórico em memória deste processo """
+    with _lock:
+        rows = [(name, ms, peak / 1024) for name, values in _history.items() for ms, peak in values]
+    return summarize(pd.DataFrame(rows, columns=['stage', 'ms', 'peak_kb']))
+
+def debug_panel():
+    """ Esta função mostra o painel de debug na barra lateral
+
+        Só aparece com a instrumentação ligada e a página aberta com ?debug=1.
+
+        Input: -
+        Output: -
+    """
+    if not ENABLED:
+        return
+    import streamlit as st
+    from curry.memo import widget_cache
+
+    if st.query_params.get('debug') != '1':
+        return
+    with st.sidebar.expander('Debug: tempos por etapa', expanded=True):
+        st.dataframe(summary(), hide_index=True)
+        st.json(widget_cache.stats())
+
+def summarize_file(path=PROFILE_PATH, freq=None):
+    """ Resumo por etapa (e por intervalo de tempo freq, ex. '1h') do arquivo JSONL """
+    df_aux = pd.read_json(path, lines=True)
+    df_aux['ts'] = pd.to_datetime(df_aux['ts'], unit='s')
+    columns = ['stage', 'ms', 'peak_kb']
+    if freq:
+        df_aux['periodo'] = df_aux['ts'].dt.floor(freq)
+        columns = ['periodo'] + columns
+    return summarize(df_aux[columns])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resumo dos tempos por etapa (p50/p95) do arquivo de profiling')
+    parser.add_argument('--path', default=PROFILE_PATH)
+    parser.add_argument('--freq', default=None, help="intervalo de tempo para agrupar, ex. '1h' ou '1D'")
+    args = parser.parse_args(argv)
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(summarize_file(args.path, args.freq).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
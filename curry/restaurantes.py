@@ -0,0 +1,132 @@
+""" Cálculos da página Visão Restaurantes (sem Streamlit)
+
+    O plotly só é importado ao montar uma figura (como em curry.empresa).
+"""
+# bibliotecas
+import numpy as np
+
+from curry.cube import cube_stats
+from curry.data import load_sketches
+from curry.metrics import Metric, compute_metrics
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+# métricas da linha "Overall Metrics", calculadas de uma vez pelo compute_metrics
+# somando as células do período (entregadores únicos: ver DISTRIBUTION_METRICS)
+OVERALL_METRICS = [
+    # a distância média dos restaurantes e dos locais de entrega.
+    # SAPE
+    # SA -> um valor (distância média) -> [10km, 20km, ..., 40km] -> média -> valor
+    # P -> calcular a distancia entre os pedidos entregues e os restaurantes -> [10km, 5km,..., 40km]
+    # E -> a coluna 'distance' já vem calculada (haversine vetorizada) e somada no cubo
+    Metric('avg_distance', 'distance', 'mean'),
+    # o tempo médio/desvio de entrega com e sem os festivais (um único agrupamento por Festival)
+    Metric('festival_avg_time', 'Time_taken(min)', 'mean', ('Festival', 'Yes')),
+    Metric('festival_std_time', 'Time_taken(min)', 'std', ('Festival', 'Yes')),
+    Metric('no_festival_avg_time', 'Time_taken(min)', 'mean', ('Festival', 'No')),
+    Metric('no_festival_std_time', 'Time_taken(min)', 'std', ('Festival', 'No')),
+]
+
+def overall_metrics(cube, decimals=2):
+    """ Esta função calcula a linha "Overall Metrics" pelo compute_metrics, somando as células do cubo
+
+        Input: cubo filtrado ou totais do período (ver Filtros.totais) e casas decimais
+        Output: dict nome -> valor (None quando o grupo não tem pedidos)
+    """
+    return compute_metrics(cube, OVERALL_METRICS, decimals)
+
+# métricas de distribuição: nome -> (medida, quantil); None = entregadores distintos
+DISTRIBUTION_METRICS = {
+    'delivery_unique': None,
+    'time_p50': ('Time_taken(min)', 0.5),
+    'time_p90': ('Time_taken(min)', 0.9),
+    'distance_p50': ('distance', 0.5),
+    'distance_p90': ('distance', 0.9),
+}
+
+def sketch_distribution(sketches, start, end, traffic_options, decimals=2):
+    # entregadores distintos e quantis combinando os sketches das células filtradas
+    metrics = {}
+    for name, spec in DISTRIBUTION_METRICS.items():
+        if spec is None:
+            metrics[name] = sketches.distinct(start, end, traffic_options)
+        else:
+            value = sketches.quantile(spec[0], spec[1], start, end, traffic_options)
+            metrics[name] = None if value is None else round(value, decimals)
+    return metrics
+
+def exact_distribution(df1, decimals=2):
+    # mesmas métricas calculadas nas linhas (modo exato, para validar os sketches);
+    # interpolation='lower': o quantil é um valor do dataset, como no sketch
+    metrics = {}
+    for name, spec in DISTRIBUTION_METRICS.items():
+        if spec is None:
+            metrics[name] = int(df1['Delivery_person_ID'].nunique())
+        else:
+            value = df1[spec[0]].quantile(spec[1], interpolation='lower') if len(df1) else None
+            metrics[name] = None if value is None else round(float(value), decimals)
+    return metrics
+
+def distance(cube):
+    import plotly.graph_objects as go
+
+    # a distância média por cidade, somando as células do cubo
+    avg_distance = cube_stats(cube, 'City', 'distance').rename(columns={'mean': 'distance'})
+
+    fig = go.Figure(data=[go.Pie(labels=avg_distance['City'], values=avg_distance['distance'], pull=[0, 0.1, 0])])
+
+    return fig
+
+def avg_std_time_graph(cube):
+    import plotly.graph_objects as go
+
+    # o tempo médio e o desvio padrão de entrega por cidade.
+    df_aux = cube_stats(cube, 'City', 'Time_taken(min)').rename(columns={'mean': 'avg_time', 'std': 'std_time'})
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='Control',
+                        x=df_aux['City'],
+                        y=df_aux['avg_time'],
+                        error_y=dict(type='data', array=df_aux['std_time'])))                
+    fig.update_layout(barmode='group')
+
+    return fig
+
+def avg_std_time_by_order_type(cube):
+    # o tempo médio e o desvio padrão de entrega por cidade e tipo de pedido.
+    df_aux = (cube_stats(cube, ['City', 'Type_of_order'], 'Time_taken(min)')
+              .rename(columns={'mean': 'avg_time', 'std': 'std_time'})
+              .drop(columns='count'))
+    return df_aux
+
+def avg_std_time_on_traffic(cube):
+    import plotly.express as px
+
+    df_aux = (cube_stats(cube, ['City', 'Road_traffic_density'], 'Time_taken(min)')
+              .rename(columns={'mean': 'avg_time', 'std': 'std_time'}))
+    fig = px.sunburst(df_aux, path=['City', 'Road_traffic_density'],
+                    values='avg_time', color='std_time', color_continuous_scale='RdBu',
+                    color_continuous_midpoint=np.average(df_aux['std_time']))                
+    return fig
+
+def widgets(filtros, modo_exato=False):
+    """ Esta função lista os cálculos da página para um estado dos filtros
+
+        Input: Filtros (ver curry.filters) e modo exato (percentis e distintos nas linhas)
+        Output: dict nome do widget -> função sem argumentos
+    """
+    # todos os widgets somam as células do período: saem dos totais (diferença de prefixos)
+    calculos = {
+        'restaurantes_overall_metrics': lambda: overall_metrics(filtros.totais()),
+        # entregadores únicos e percentis: combinação dos sketches das células filtradas
+        'restaurantes_distribution/sketch': lambda: sketch_distribution(load_sketches(filtros.path), filtros.start,
+                                                                        filtros.end, filtros.traffic_options),
+        'avg_std_time_graph': lambda: avg_std_time_graph(filtros.totais()),
+        'avg_std_time_by_order_type': lambda: avg_std_time_by_order_type(filtros.totais()),
+        'distance_by_city': lambda: distance(filtros.totais()),
+        'avg_std_time_on_traffic': lambda: avg_std_time_on_traffic(filtros.totais()),
+    }
+    if modo_exato:
+        calculos['restaurantes_distribution/exato'] = lambda: exact_distribution(filtros.linhas())
+    return calculos
@@ -0,0 +1,145 @@
+""" Sketches para contagem de distintos e quantis sob qualquer filtro
+
+    Para cada célula (dia, trânsito) o dataset é resumido em:
+      - um HyperLogLog dos Delivery_person_ID (entregadores distintos), e
+      - um DDSketch de cada medida (quantis com erro relativo <= ALPHA).
+
+    Os dois são mescláveis: o filtro da barra lateral escolhe as células e os
+    sketches delas são combinados (máximo dos registradores do HyperLogLog,
+    soma dos contadores do DDSketch), sem voltar às linhas. Pelo mesmo motivo
+    índices de lotes diferentes se juntam com merge (ver curry.chunked).
+
+    Erro esperado: ~1.04 / sqrt(2 ** HLL_PRECISION) (~1,6%) na contagem de
+    distintos e no máximo ALPHA (1%) nos quantis.
+"""
+# bibliotecas
+import numpy as np
+import pandas as pd
+
+# HyperLogLog: 2 ** 12 registradores por célula
+HLL_PRECISION = 12
+HLL_REGISTERS = 2 ** HLL_PRECISION
+
+# DDSketch: erro relativo ALPHA nos quantis; valores entre MIN_VALUE e MAX_VALUE
+# (abaixo de MIN_VALUE, inclusive zero, vão para o bucket 0)
+ALPHA = 0.01
+GAMMA = (1 + ALPHA) / (1 - ALPHA)
+MIN_VALUE = 1e-3
+MAX_VALUE = 1e6
+KEY_MIN = int(np.ceil(np.log(MIN_VALUE) / np.log(GAMMA)))
+KEY_MAX = int(np.ceil(np.log(MAX_VALUE) / np.log(GAMMA)))
+DD_BUCKETS = KEY_MAX - KEY_MIN + 2
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def _bit_length(values):
+    # bit_length de uint64, exato: cada metade de 32 bits cabe em um float64
+    hi = (values >> np.uint64(32)).astype(np.float64)
+    lo = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+
+def hll_positions(ids):
+    """ Registrador e valor (posição do primeiro bit 1) de cada id no HyperLogLog """
+    hashes = pd.util.hash_pandas_object(pd.Series(ids), index=False).to_numpy()
+    register = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+    rest = hashes & np.uint64((1 << (64 - HLL_PRECISION)) - 1)
+    rank = (64 - HLL_PRECISION) - _bit_length(rest) + 1
+    return register, rank.astype(np.uint8)
+
+def hll_count(registers):
+    """ Estimativa da quantidade de distintos a partir dos registradores (já mesclados) """
+    m = HLL_REGISTERS
+    estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = np.count_nonzero(registers == 0)
+    # poucos distintos: contagem linear é mais precisa
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+def dd_keys(values):
+    """ Bucket do DDSketch de cada valor """
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        keys = np.ceil(np.log(values) / np.log(GAMMA))
+    keys = np.clip(np.nan_to_num(keys, nan=KEY_MIN, neginf=KEY_MIN), KEY_MIN, KEY_MAX)
+    return np.where(values < MIN_VALUE, 0, keys - KEY_MIN + 1).astype(np.int64)
+
+def dd_quantile(counts, q):
+    """ Quantil q a partir dos contadores do DDSketch (já mesclados); None se vazio """
+    total = counts.sum()
+    if not total:
+        return None
+    position = int(np.searchsorted(np.cumsum(counts), q * (total - 1), side='right'))
+    if position == 0:
+        return 0.0
+    key = position - 1 + KEY_MIN
+    # valor representativo do bucket (gamma ** (k-1), gamma ** k]
+    return float(2 * GAMMA ** key / (GAMMA + 1))
+
+class SketchIndex:
+    """ Sketches por célula (dia, trânsito) de um dataframe ordenado por Order_Date
+
+        days, traffic: dia e nível de trânsito de cada célula (células ordenadas por dia)
+        registers:     HyperLogLog dos Delivery_person_ID, uma linha por célula
+        counts:        dict medida -> DDSketch, uma linha por célula
+    """
+
+    def __init__(self, df1, measures=('Time_taken(min)', 'distance')):
+        cells = df1.groupby(['Order_Date', 'Road_traffic_density'], observed=True, sort=True).ngroup().to_numpy()
+        keys = df1[['Order_Date', 'Road_traffic_density']].drop_duplicates().sort_values(['Order_Date', 'Road_traffic_density'])
+        self.days = keys['Order_Date'].to_numpy()
+        self.traffic = keys['Road_traffic_density'].astype(str).to_numpy()
+        n_cells = len(keys)
+
+        register, rank = hll_positions(df1['Delivery_person_ID'])
+        self.registers = np.zeros((n_cells, HLL_REGISTERS), dtype=np.uint8)
+        np.maximum.at(self.registers, (cells, register), rank)
+
+        self.counts = {}
+        for m in measures:
+            flat = cells * DD_BUCKETS + dd_keys(df1[m].to_numpy())
+            self.counts[m] = np.bincount(flat, minlength=n_cells * DD_BUCKETS).reshape(n_cells, DD_BUCKETS)
+
+    def merge(self, *others):
+        """ Junta ao índice os sketches de outros lotes (máximo dos registradores, soma dos contadores)
+
+            Células (dia, trânsito) presentes em mais de um são combinadas; as
+            demais entram como estão.
+        """
+        parts = [self, *others]
+        days = np.concatenate([p.days for p in parts])
+        traffic = np.concatenate([p.traffic for p in parts])
+        if not len(days):
+            return self
+        order = np.lexsort((traffic, days))
+        days, traffic = days[order], traffic[order]
+        first = np.flatnonzero(np.r_[True, (days[1:] != days[:-1]) | (traffic[1:] != traffic[:-1])])
+
+        self.registers = np.maximum.reduceat(np.concatenate([p.registers for p in parts])[order], first)
+        for m in self.counts:
+            self.counts[m] = np.add.reduceat(np.concatenate([p.counts[m] for p in parts])[order], first)
+        self.days, self.traffic = days[first], traffic[first]
+        return self
+
+    def _position(self, date):
+        return int(np.searchsorted(self.days, np.datetime64(pd.Timestamp(date), 'ns'), side='left'))
+
+    def _cells(self, start, end, traffic_options):
+        # células com start <= Order_Date < end e trânsito entre os escolhidos
+        first = 0 if start is None else self._position(start)
+        last = max(first, self._position(end))
+        return first + np.flatnonzero(np.isin(self.traffic[first:last], list(traffic_options)))
+
+    def distinct(self, start, end, traffic_options):
+        """ Entregadores distintos (estimativa) nos pedidos filtrados """
+        cells = self._cells(start, end, traffic_options)
+        if not len(cells):
+            return 0
+        return hll_count(self.registers[cells].max(axis=0))
+
+    def quantile(self, measure, q, start, end, traffic_options):
+        """ Quantil q (estimativa) de uma medida nos pedidos filtrados """
+        cells = self._cells(start, end, traffic_options)
+        return dd_quantile(self.counts[measure][cells].sum(axis=0), q)
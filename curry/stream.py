@@ -0,0 +1,198 @@
+""" Modo ao vivo: ingestão contínua de um arquivo de pedidos só de acréscimo
+
+    Um LiveFeed acompanha o arquivo (mesmo formato do train.csv, com
+    cabeçalho) a partir do último byte lido. Cada leitura pega no máximo
+    MAX_BATCH_BYTES de linhas completas, limpa o micro-lote com as regras do
+    clean_code e o soma ao cubo acumulado (ver curry.cube.merge_cubes) e ao
+    agregado semanal (ver curry.weekly). As linhas antigas não são lidas de
+    novo: cada lote custa o tamanho do lote e do cubo, não do histórico.
+
+    Para testar sem uma fonte real, o modo replay copia as linhas de um csv
+    para o arquivo do feed aos poucos:
+        python -m curry.stream replay --source data/train.csv --rows-per-second 200
+"""
+# bibliotecas
+import argparse
+import io
+import os
+import threading
+import time
+from functools import lru_cache
+
+import pandas as pd
+
+from curry.cleaning import prepare
+from curry.cube import build_cube, merge_cubes
+from curry.weekly import WeeklyRollup
+
+FEED_PATH = os.environ.get('CURRY_FEED_PATH', 'data/feed.csv')
+
+# limite de bytes por lote (~20 mil linhas): mantém o tempo de cada atualização
+# limitado mesmo quando há muito atraso; o restante fica para a próxima leitura
+MAX_BATCH_BYTES = 4 * 2 ** 20
+
+# intervalo de atualização das seções ao vivo das páginas
+REFRESH_SECONDS = 2
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+class LiveFeed:
+    """ Estado acumulado de um arquivo de pedidos que só recebe linhas novas
+
+        poll() lê e agrega o próximo micro-lote; snapshot() entrega o cubo
+        acumulado e weekly() a tabela semanal. Um único LiveFeed por arquivo e
+        por processo (ver live_feed), compartilhado entre as sessões: as
+        leituras são protegidas por um lock.
+    """
+
+    def __init__(self, path, max_batch_bytes=MAX_BATCH_BYTES):
+        self.path = path
+        self.max_batch_bytes = max_batch_bytes
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.names = None
+        self.offset = 0
+        self.cube = None
+        self.rollup = WeeklyRollup()
+        self.rows = 0
+        self.batches = 0
+        self.last_batch = {'rows': 0, 'seconds': 0.0}
+
+    def _read(self):
+        # linhas completas a partir do offset, até max_batch_bytes
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(self.max_batch_bytes)
+        return data[:data.rfind(b'\n') + 1]
+
+    def poll(self):
+        """ Esta função lê e agrega o próximo micro-lote do arquivo
+
+            Input: -
+            Output: quantidade de linhas novas (depois da limpeza)
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                return 0
+            # arquivo truncado ou recriado: recomeça do início
+            if os.path.getsize(self.path) < self.offset:
+                self._reset()
+
+            start = time.perf_counter()
+            data = self._read()
+            if not data:
+                return 0
+            # offset e cabeçalho só avançam depois que o lote foi agregado: um lote
+            # que falha na leitura ou na limpeza é lido de novo no próximo poll
+            offset = self.offset + len(data)
+            names = self.names
+            if names is None:
+                header, _, data = data.partition(b'\n')
+                names = header.decode().strip().split(',')
+                if not data:
+                    self.names, self.offset = names, offset
+                    return 0
+
+            batch = prepare(pd.read_csv(io.BytesIO(data), header=None, names=names))
+            if len(batch):
+                cube = merge_cubes([self.cube, build_cube(batch)])
+                self.rollup.extend(batch)
+                self.cube = cube
+                self.rows += len(batch)
+            self.names, self.offset = names, offset
+            self.batches += 1
+            self.last_batch = {'rows': len(batch), 'seconds': time.perf_counter() - start}
+            return len(batch)
+
+    def snapshot(self):
+        """ Esta função entrega o cubo acumulado e o estado da ingestão
+
+            Input: -
+            Output: (cubo ou None se ainda não chegou nenhum pedido, dict com o estado)
+        """
+        with self._lock:
+            cube = None if self.cube is None else self.cube.copy(deep=False)
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            state = {'rows': self.rows, 'batches': self.batches, 'pending_bytes': max(0, size - self.offset),
+                     'last_batch_rows': self.last_batch['rows'], 'last_batch_seconds': self.last_batch['seconds']}
+            return cube, state
+
+    def weekly(self, traffic_options):
+        """ Tabela semanal (ver WeeklyRollup.table) dos pedidos recebidos até agora """
+        with self._lock:
+            return self.rollup.table(traffic_options)
+
+@lru_cache(maxsize=None)
+def live_feed(path=FEED_PATH):
+    """ O LiveFeed compartilhado do arquivo (um por processo) """
+    return LiveFeed(path)
+
+def live_panel(traffic_options, render, path=FEED_PATH):
+    """ Esta função desenha a seção ao vivo de uma página
+
+        A seção é um fragmento reexecutado sozinho a cada REFRESH_SECONDS: lê
+        só os pedidos novos, mostra o estado da ingestão e chama render com o
+        cubo acumulado (filtrado pelo trânsito) para desenhar os gráficos da página.
+
+        Input:
+            - traffic_options: níveis de trânsito escolhidos na barra lateral
+            - render: função que recebe o cubo e desenha os gráficos
+            - path: arquivo do feed
+        Output: -
+    """
+    import streamlit as st
+
+    @st.fragment(run_every=REFRESH_SECONDS)
+    def painel_ao_vivo():
+        feed = live_feed(path)
+        feed.poll()
+        cube, estado = feed.snapshot()
+        if cube is None:
+            st.info('Aguardando pedidos em %s' % feed.path)
+            return
+        cube = cube.loc[cube['Road_traffic_density'].isin(traffic_options), :]
+
+        st.caption('%d pedidos recebidos | último lote: %d linhas em %.0f ms | %d bytes pendentes'
+                   % (estado['rows'], estado['last_batch_rows'], estado['last_batch_seconds'] * 1000,
+                      estado['pending_bytes']))
+        render(cube)
+
+    painel_ao_vivo()
+
+def replay(source, feed, rows_per_second):
+    """ Esta função copia as linhas de um csv para o arquivo do feed, aos poucos
+
+        Input: csv de origem, arquivo do feed e linhas por segundo
+        Output: -
+    """
+    with open(source, 'rb') as src:
+        header = src.readline()
+        new_feed = not os.path.exists(feed) or os.path.getsize(feed) == 0
+        with open(feed, 'ab') as out:
+            if new_feed:
+                out.write(header)
+            while True:
+                lines = [line for line in (src.readline() for _ in range(rows_per_second)) if line]
+                if not lines:
+                    break
+                out.writelines(lines)
+                out.flush()
+                print('%d linhas acrescentadas em %s' % (len(lines), feed), flush=True)
+                time.sleep(1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=['replay'])
+    parser.add_argument('--source', default='data/train.csv')
+    parser.add_argument('--feed', default=FEED_PATH)
+    parser.add_argument('--rows-per-second', type=int, default=200)
+    args = parser.parse_args()
+
+    replay(args.source, args.feed, args.rows_per_second)
+
+if __name__ == '__main__':
+    main()
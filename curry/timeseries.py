@@ -0,0 +1,89 @@
+""" Séries temporais com tamanho limitado para os gráficos
+
+    Com anos de histórico, uma barra por dia ou um ponto por semana deixa o
+    JSON da figura (e o desenho no navegador) crescendo sem limite. Aqui:
+      - bin_by_period escolhe o período das barras (dia, semana, mês...) pelo
+        intervalo de datas, para nunca passar de MAX_BARS barras;
+      - lttb reduz uma linha a no máximo MAX_LINE_POINTS pontos com o
+        Largest-Triangle-Three-Buckets, que mantém picos e vales.
+"""
+# bibliotecas
+import numpy as np
+import pandas as pd
+
+MAX_BARS = 180
+MAX_LINE_POINTS = 500
+
+# períodos em ordem crescente: (frequência do pandas, nome mostrado no eixo)
+PERIODS = [('D', 'dia'), ('W', 'semana'), ('M', 'mês'), ('Q', 'trimestre'), ('Y', 'ano')]
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def choose_period(dates, max_bars=MAX_BARS):
+    """ Menor período (dia, semana, mês, trimestre, ano) em que o intervalo de datas cabe em max_bars barras """
+    if not len(dates):
+        return PERIODS[0]
+    start, end = dates.min(), dates.max()
+    for freq, label in PERIODS:
+        bins = len(pd.period_range(start, end, freq=freq))
+        if bins <= max_bars:
+            return freq, label
+    return PERIODS[-1]
+
+def bin_by_period(df_aux, date_col, value_col, max_bars=MAX_BARS):
+    """ Esta função soma os valores por período (dia, semana, mês..., escolhido automaticamente)
+
+        Input:
+            - df_aux: Dataframe com a coluna de datas e a de valores
+            - date_col, value_col: nomes das colunas
+            - max_bars: quantidade máxima de barras
+        Output: (Dataframe com date_col = início do período e value_col somado, nome do período)
+    """
+    freq, label = choose_period(df_aux[date_col], max_bars)
+    if freq == 'D':
+        return df_aux[[date_col, value_col]], label
+    periods = df_aux[date_col].dt.to_period(freq).dt.start_time
+    df_aux = df_aux[value_col].groupby(periods.rename(date_col)).sum().reset_index()
+    return df_aux, label
+
+def lttb(x, y, n_out):
+    """ Esta função escolhe n_out pontos de uma linha com o Largest-Triangle-Three-Buckets
+
+        O primeiro e o último ponto são mantidos; de cada bucket intermediário
+        fica o ponto que forma o maior triângulo com o ponto escolhido no bucket
+        anterior e a média do bucket seguinte (preserva picos e vales).
+
+        Input: x e y (arrays numéricos, x crescente) e quantidade de pontos
+        Output: array com as posições escolhidas
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    every = (n - 2) / (n_out - 2)
+    chosen = np.empty(n_out, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        # bucket atual e média do bucket seguinte
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        chosen[i + 1] = a
+    return chosen
+
+def downsample_line(df_aux, x_col, y_col, max_points=MAX_LINE_POINTS):
+    """ Mantém no máximo max_points linhas do dataframe (ordenado por x_col), escolhidas pelo LTTB """
+    if len(df_aux) <= max_points:
+        return df_aux
+    x = df_aux[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype('int64')
+    return df_aux.iloc[lttb(x.to_numpy(), df_aux[y_col].to_numpy(), max_points)]
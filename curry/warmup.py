@@ -0,0 +1,66 @@
+""" Warm-up do cache de widgets para o estado padrão da barra lateral
+
+    Ao iniciar, uma thread em segundo plano calcula todos os widgets das três
+    páginas com os filtros padrão (do primeiro dia do dataset a 2022-04-13,
+    todos os níveis de trânsito): quem abre o dashboard nesse estado recebe
+    tudo do cache. O warm-up se repete a cada WARM_UP_SECONDS, antes de as
+    entradas expirarem (TTL do curry.memo), e assim também cobre uma nova
+    versão do dataset.
+"""
+# bibliotecas
+import logging
+import os
+import threading
+import time
+
+from curry import empresa, entregadores, restaurantes
+from curry.filters import Filtros, compute_widgets
+from curry.memo import TTL_SECONDS
+
+WARM_UP_SECONDS = TTL_SECONDS / 3
+
+logger = logging.getLogger(__name__)
+
+_started = []
+_lock = threading.Lock()
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def warm_up():
+    """ Esta função calcula (ou encontra no cache) os widgets do estado padrão das páginas
+
+        Input: -
+        Output: quantidade de widgets
+    """
+    filtros = Filtros()
+    total = 0
+    for module in (empresa, entregadores, restaurantes):
+        total += len(compute_widgets(filtros, module.widgets(filtros)))
+    return total
+
+def _loop():
+    while True:
+        try:
+            start = time.perf_counter()
+            total = warm_up()
+            logger.info('warm-up: %d widgets em %.2f s', total, time.perf_counter() - start)
+        except Exception:
+            # sem dados ainda, arquivo sendo trocado etc.: tenta de novo no próximo ciclo
+            logger.exception('warm-up falhou')
+        time.sleep(WARM_UP_SECONDS)
+
+def warm_up_enabled():
+    """ False com CURRY_WARM_UP=0 (ex.: nas medidas de reexecução do benchmarks.bench_startup) """
+    return os.environ.get('CURRY_WARM_UP', '1') not in ('', '0')
+
+def start_warm_up():
+    """ Inicia a thread de warm-up (uma única vez por processo; nada com CURRY_WARM_UP=0) """
+    if not warm_up_enabled():
+        return
+    with _lock:
+        if _started:
+            return
+        _started.append(True)
+    threading.Thread(target=_loop, name='curry-warmup', daemon=True).start()
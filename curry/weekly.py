@@ -0,0 +1,152 @@
+""" Agregado semanal dos pedidos (gráficos da Visão Tática)
+
+    Para cada (ano, semana, trânsito) guarda a quantidade de pedidos e o conjunto de
+    entregadores que fizeram entregas. As semanas são inteiros no mesmo padrão
+    do strftime('%U') (semanas começando no domingo; os dias antes do primeiro
+    domingo do ano são a semana 0), calculados sem formatar texto por linha.
+
+    Internamente a chave também tem o ano; nas tabelas, como no '%U', semanas
+    de anos diferentes com o mesmo número são somadas.
+
+    Um período [início, fim) que começa ou termina no meio de uma semana deixa
+    essas semanas incompletas: só elas são calculadas a partir das linhas, as
+    semanas inteiras dentro do período saem do agregado.
+"""
+# bibliotecas
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# Funções
+# -------------------------------
+
+def week_of_year(dates):
+    """ Semana do ano (inteiro) igual ao strftime('%U'), para uma Series de datas """
+    dates = pd.to_datetime(dates)
+    sunday_based = (dates.dt.dayofweek + 1) % 7
+    return ((dates.dt.dayofyear - 1 + 7 - sunday_based) // 7).astype(np.int64)
+
+def week_start(date):
+    """ Primeiro dia da semana ('%U') da data: o domingo anterior ou 1º de janeiro """
+    date = pd.Timestamp(date).normalize()
+    return max(date - datetime.timedelta(days=(date.dayofweek + 1) % 7), pd.Timestamp(date.year, 1, 1))
+
+def next_week_start(date):
+    """ Primeiro dia da semana seguinte à da data: o próximo domingo ou 1º de janeiro do ano seguinte """
+    date = pd.Timestamp(date).normalize()
+    return min(date + datetime.timedelta(days=7 - (date.dayofweek + 1) % 7), pd.Timestamp(date.year + 1, 1, 1))
+
+def _key_start(year, week):
+    # primeiro dia da semana (ano, semana): a semana 0 começa em 1º de janeiro,
+    # a semana 1 no primeiro domingo do ano
+    jan1 = pd.Timestamp(year, 1, 1)
+    if week == 0:
+        return jan1
+    return jan1 + datetime.timedelta(days=(6 - jan1.dayofweek) % 7 + 7 * (week - 1))
+
+def _rollup(df1, weight=None):
+    # (ano, semana, trânsito) -> quantidade de pedidos e entregadores distintos;
+    # com weight, cada linha é uma célula já agregada com weight pedidos
+    keys = [df1['Order_Date'].dt.year.rename('year'), week_of_year(df1['Order_Date']).rename('week_of_year'),
+            df1['Road_traffic_density']]
+    grouped = df1.groupby(keys, observed=True)['Delivery_person_ID']
+    if weight is None:
+        counts = grouped.size()
+    else:
+        counts = df1[weight].groupby(keys, observed=True).sum().astype(np.int64)
+    couriers = {key: set(ids) for key, ids in grouped.unique().items()}
+    return counts, couriers
+
+def _weekly_table(parts, traffic_options):
+    # parts: lista de (WeeklyRollup, (ano, semana) considerados ou None = todos)
+    traffic_options = set(traffic_options)
+    orders, couriers = {}, {}
+    for rollup, weeks in parts:
+        for (year, week, traffic), count in rollup.counts.items():
+            if traffic not in traffic_options or (weeks is not None and (year, week) not in weeks):
+                continue
+            # semanas de anos diferentes com o mesmo número caem juntas, como no '%U'
+            orders[week] = orders.get(week, 0) + count
+            couriers.setdefault(week, set()).update(rollup.couriers[(year, week, traffic)])
+
+    weeks = sorted(orders)
+    return pd.DataFrame({'week_of_year': weeks,
+                         'ID': [orders[w] for w in weeks],
+                         'Delivery_person_ID': [len(couriers[w]) for w in weeks]})
+
+class WeeklyRollup:
+    """ Pedidos e entregadores distintos por (ano, semana, trânsito)
+
+        counts:   Series (ano, semana, trânsito) -> quantidade de pedidos
+        couriers: dict (ano, semana, trânsito) -> set de Delivery_person_ID
+
+        O agregado só cresce: extend() soma um lote novo de linhas sem
+        recalcular as semanas anteriores. Com weight, as linhas são células
+        já agregadas (ex. o cubo por entregador, ver curry.cube) e a coluna
+        weight tem a quantidade de pedidos de cada uma.
+    """
+
+    def __init__(self, df1=None, weight=None):
+        self.counts = pd.Series(dtype=np.int64)
+        self.couriers = {}
+        if df1 is not None:
+            self.extend(df1, weight)
+
+    def extend(self, df1, weight=None):
+        """ Acrescenta ao agregado as linhas (ou células, com weight) de um lote novo """
+        if not len(df1):
+            return self
+        counts, couriers = _rollup(df1, weight)
+        self.counts = counts.add(self.counts, fill_value=0).astype(np.int64) if len(self.counts) else counts
+        for key, ids in couriers.items():
+            self.couriers.setdefault(key, set()).update(ids)
+        return self
+
+    def table(self, traffic_options, weeks=None):
+        """ Esta função monta a tabela semanal para os níveis de trânsito escolhidos
+
+            Input:
+                - traffic_options: níveis de trânsito
+                - weeks: (ano, semana) considerados (None = todos)
+            Output: Dataframe com week_of_year, ID (pedidos) e Delivery_person_ID (entregadores distintos)
+        """
+        return _weekly_table([(self, weeks)], traffic_options)
+
+    def between(self, rows, start, end, traffic_options, weight=None):
+        """ Esta função monta a tabela semanal dos pedidos com start <= Order_Date < end
+
+            As semanas inteiras dentro do período saem do agregado; as semanas
+            do início e do fim, se estiverem incompletas, são calculadas a
+            partir das suas linhas. As linhas devem cobrir o mesmo dataset do
+            agregado: no modo out-of-core são as células do cubo por
+            entregador (weight='count'), e não a amostra das linhas.
+
+            Input:
+                - rows: função (início, fim) -> linhas (ou células) com início <= Order_Date < fim
+                - start, end: período (start=None: desde o início)
+                - traffic_options: níveis de trânsito
+                - weight: coluna com os pedidos de cada célula (None = uma linha por pedido)
+            Output: Dataframe com week_of_year, ID e Delivery_person_ID
+        """
+        end = pd.Timestamp(end)
+        # [head_end, tail_start): semanas inteiras; antes e depois, semanas incompletas
+        tail_start = week_start(end)
+        if start is None:
+            head_end = None
+        else:
+            start = pd.Timestamp(start)
+            head_end = start if start == week_start(start) else next_week_start(start)
+
+        if head_end is not None and head_end >= tail_start:
+            # período dentro de uma semana (ou de duas semanas vizinhas incompletas)
+            return _weekly_table([(WeeklyRollup(rows(start, end), weight), None)], traffic_options)
+
+        weeks = {(y, w) for y, w, _ in self.counts.index}
+        full_weeks = {key for key in weeks
+                      if (head_end is None or _key_start(*key) >= head_end) and _key_start(*key) < tail_start}
+        parts = [(self, full_weeks), (WeeklyRollup(rows(tail_start, end), weight), None)]
+        if head_end is not None:
+            parts.append((WeeklyRollup(rows(start, head_end), weight), None))
+        return _weekly_table(parts, traffic_options)
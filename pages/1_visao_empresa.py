@@ -1,226 +1,175 @@
-# bibliotecas
-import plotly.express as px
-import plotly.graph_objects as go
-import streamlit as st
-import pandas as pd
-import folium
-import datetime
-
-from haversine import haversine
-from PIL import Image
-from streamlit_folium import folium_static
-
-st.set_page_config(page_title='Visão Negócio', page_icon='📈', layout='wide')
-
-# -------------------------------
-# Funções
-# -------------------------------
-
-def clean_code(df1):
-    """ Esta função tem a responsabilidade de limpar o dataframe 
-    
-        Tipos de limpeza:
-        1. Remoção dos dados NaN
-        2. Mudança do tipo da coluna de dados
-        3. Remoção dos espaços das variáveis de texto
-        4. Formatação da coluna de datas 
-        5. Limpeza da coluna de tempo (remoção do texto da variável numérica)
-
-        Input: Dataframe
-        Output: Dataframe
-    """
-    # 1. convertendo a coluna age de texto para numero
-    df1 = df1[df1['Delivery_person_Age'] != 'NaN ']
-
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-
-    df1 = df1[df1['Road_traffic_density'] != 'NaN ']
-
-    df1 = df1[df1['City'] != 'NaN ']
-
-    df1 = df1[df1['Festival'] != 'NaN ']
-
-    # 2. convertendo a coluna ratings de texto para numero decilam float
-
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-
-    # 3. convertendo a coluna order_date de texto para data
-
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-
-    # 4. convertendo multiple_deliveries de texto para numero inteiro int
-    df1 = df1[df1['multiple_deliveries'] != 'NaN ']
-
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-
-    # 5. removendo os espacos dentro das strings
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-
-    # 6. limpando a coluna de time taken 
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1]).astype(int)
-
-    return df1
-
-def order_metric(df1):
-    # colunas
-    cols = ['ID', 'Order_Date']
-    # selecao de linhas
-    df_aux = df1[cols].groupby('Order_Date').count().reset_index()
-    # desenhar o gráfico de linhas
-    # Plotly
-    fig = px.bar(df_aux, x='Order_Date',
-                y='ID')            
-    return fig
-
-def traffic_order_share(df1):
-    df1 = df1[df1['Road_traffic_density'] != 'NaN']
-    df_aux = df1[['ID', 'Road_traffic_density']].groupby('Road_traffic_density').count().reset_index()
-    df_aux['entregas_perc'] = df_aux['ID'] / df_aux['ID'].sum()
-    fig = px.pie(df_aux, values='entregas_perc',
-                names='Road_traffic_density')   
-                 
-    return fig
-
-def traffic_order_city(df1):
-    df1 = df1[df1['City'] != 'NaN']
-    df_aux = df1[['ID', 'City', 'Road_traffic_density']].groupby(['City', 'Road_traffic_density']).count().reset_index()
-    fig = px.scatter(df_aux, x='City',
-                    y='Road_traffic_density',
-                    size='ID',
-                    color='City')
-    
-    return fig
-
-def  order_by_week(df1):
-    # criar a coluna de semana
-    df1['week_of_year'] = df1['Order_Date'].dt.strftime('%U')
-    df_aux = df1[['ID', 'week_of_year']].groupby('week_of_year').count().reset_index()
-    fig = px.line(df_aux, x='week_of_year',
-                y='ID')            
-    return fig
-
-def order_share_by_week(df1):
-    # quantidade de pedidos por semana / número único de entregadores por semana
-    df_aux1 = df1[['ID', 'week_of_year']].groupby('week_of_year').count().reset_index()
-    df_aux2 = df1[['Delivery_person_ID', 'week_of_year']].groupby('week_of_year').nunique().reset_index()
-    df_aux = pd.merge(df_aux1, df_aux2, 
-            how='inner')
-    df_aux['order_by_delivery'] = df_aux['ID'] / df_aux['Delivery_person_ID']
-    fig = px.line(df_aux, x='week_of_year',
-                y='order_by_delivery')
-    
-    return fig
-
-def country_maps(df1):
-    df_aux = df1[['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']].groupby(['City', 'Road_traffic_density'])\
-                                                                                                        .median().reset_index()
-    map = folium.Map()
-    for i in range(len(df_aux)):
-            folium.Marker([df_aux.loc[i,'Delivery_location_latitude'], df_aux.loc[i,'Delivery_location_longitude']],
-            popup=df_aux.loc[i, ['City', 'Road_traffic_density']]).add_to(map)
-    #for index, location_info in df_aux.iterrows():
-    #    folium.Marker([location_info['Delivery_location_latitude'], 
-    #                  location_info['Delivery_location_longitude']]).add_to(map)        
-    folium_static(map, width=1024, height=600)
-
-# ---------------------------- Início da estrutura lógica do código ----------------------
-# -------------------------------
-# importando dados
-# -------------------------------
-df = pd.read_csv('data/train.csv')
-
-# -------------------------------
-# Limpando dados
-# -------------------------------
-df1 = clean_code(df)
-
-
-##################################################################################################
-# Barra Lateral
-##################################################################################################
-
-st.header('Marketplace - Visão Cliente')
-
-
-#image_path = 'C:/Users/jonat/OneDrive/Documentos/repos/dashboards/'
-image = Image.open('cury.png')
-
-st.sidebar.image(image, width=350)
-
-st.sidebar.markdown('# Curry Company')
-st.sidebar.markdown('## Fastest Delivery in Town')
-st.sidebar.markdown("""---""")
-
-st.sidebar.markdown('## Selecione uma data limite')
-date_slider = st.sidebar.slider(
-                  'Até qual valor?',
-                   value=datetime.datetime(2022, 4, 13),
-                   min_value=datetime.datetime(2022, 2, 11),
-                   max_value=datetime.datetime(2022, 6, 4),
-                   format='DD-MM-YYYY'
-)
-
-st.sidebar.markdown("""---""")
-
-traffic_options = st.sidebar.multiselect(
-                      'Quais as condições do trânsito',
-                      ['Low', 'Medium', 'High', 'Jam'],
-                      default=['Low', 'Medium', 'High', 'Jam']
-)
-
-st.sidebar.markdown("""---""")
-
-# Filtro de data
-linhas_selecionadas = df1['Order_Date'] < date_slider
-df1 = df1.loc[linhas_selecionadas, :]
-
-# Filtro de trânsito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas, :]
-
-##################################################################################################
-# Layout Streamlit
-##################################################################################################
-
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'])
-
-with tab1:
-    with st.container():
-        # Order Metric
-        st.markdown('# Orders by Day')
-        fig = order_metric(df1)
-        st.plotly_chart(fig, use_container_width=True)
-
-    with st.container():
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.header('Traffic Order Share')
-            fig = traffic_order_share(df1)
-
-            st.plotly_chart(fig, use_container_width=True)
-
-        with col2:
-            fig = traffic_order_city(df1)
-            st.header('Traffic Order City')
-            st.plotly_chart(fig, use_container_width=True)
-
-with tab2:
-    with st.container():
-        st.markdown('# Order by Week')
-        fig = order_by_week(df1)
-        st.plotly_chart(fig, use_container_width=True)
-
-    with st.container():
-        st.markdown('# Order Share by Week')
-        fig = order_share_by_week(df1)
-        st.plotly_chart(fig, use_container_width=True)
-
-with tab3:
-    st.markdown('# Country Maps')
-    country_maps(df1)
\ No newline at end of file
+# bibliotecas
+import streamlit as st
+import streamlit.components.v1 as components
+
+from curry.assets import LOGO_WIDTH, logo
+from curry.data import load_grid
+from curry.empresa import (DEFAULT_GRID_POINTS, DEFAULT_MAP_MODE, DEFAULT_RADIUS_KM, GRID_POINTS, MAP_MODES, TABS,
+                           order_by_week, order_metric, order_share_by_week, traffic_order_share, widgets)
+from curry.filters import TRAFFIC_LEVELS, Filtros, compute_widgets, date_bounds, default_range
+from curry.profiling import debug_panel, page_stage, stage
+from curry.stream import FEED_PATH, live_feed, live_panel
+from curry.warmup import start_warm_up
+
+st.set_page_config(page_title='Visão Negócio', page_icon='📈', layout='wide')
+
+# ---------------------------- Início da estrutura lógica do código ----------------------
+# -------------------------------
+# importando dados (já limpos e em cache por processo)
+# -------------------------------
+# warm-up do estado padrão das três páginas (uma vez por processo, em segundo plano)
+start_warm_up()
+
+# tempos por etapa desta execução (só com CURRY_PROFILE=1, ver curry.profiling)
+pagina = page_stage('visao_empresa').start()
+
+##################################################################################################
+# Barra Lateral
+##################################################################################################
+
+st.header('Marketplace - Visão Cliente')
+
+
+# logo decodificado e redimensionado uma vez por processo (ver curry.assets)
+st.sidebar.image(logo(), width=LOGO_WIDTH)
+
+st.sidebar.markdown('# Curry Company')
+st.sidebar.markdown('## Fastest Delivery in Town')
+st.sidebar.markdown("""---""")
+
+st.sidebar.markdown('## Selecione um período')
+# limites do período a partir dos dias do cubo diário; a data final não entra no filtro
+date_min, date_max = date_bounds()
+date_range = st.sidebar.slider(
+                  'De / até',
+                   value=default_range(),
+                   min_value=date_min,
+                   max_value=date_max,
+                   format='DD-MM-YYYY'
+)
+
+st.sidebar.markdown("""---""")
+
+traffic_options = st.sidebar.multiselect(
+                      'Quais as condições do trânsito',
+                      TRAFFIC_LEVELS,
+                      default=TRAFFIC_LEVELS
+)
+
+st.sidebar.markdown("""---""")
+
+ao_vivo = st.sidebar.toggle('Atualização ao vivo', help='Acompanha os pedidos novos de %s' % FEED_PATH)
+
+st.sidebar.markdown("""---""")
+
+# estado dos filtros; os dados filtrados só são calculados se algum widget não estiver no cache
+filtros = Filtros(date_range, traffic_options)
+
+# seção ao vivo (ver curry.stream.live_panel): os gráficos do cubo e da tabela semanal dos pedidos recebidos
+def graficos_ao_vivo(cube):
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(order_metric(cube), use_container_width=True)
+    with col2:
+        st.plotly_chart(traffic_order_share(cube), use_container_width=True)
+    weekly = live_feed().weekly(traffic_options)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(order_by_week(weekly), use_container_width=True)
+    with col2:
+        st.plotly_chart(order_share_by_week(weekly), use_container_width=True)
+
+##################################################################################################
+# Layout Streamlit
+##################################################################################################
+
+# só a aba aberta é calculada e desenhada: com st.tabs o corpo de todas as abas
+# (inclusive o mapa folium) roda a cada interação. Os resultados ficam no cache
+# de widgets, então voltar a uma aba já vista não recalcula nada.
+aba = st.radio('Aba', TABS, horizontal=True, label_visibility='collapsed', key='aba')
+
+# widgets fora da tela perdem o estado; reatribuir mantém as escolhas do mapa ao trocar de aba
+for chave in ('map_mode', 'grid_label', 'restaurante', 'raio_km'):
+    if chave in st.session_state:
+        st.session_state[chave] = st.session_state[chave]
+
+map_mode, grid_label, restaurant, radius_km = DEFAULT_MAP_MODE, None, None, DEFAULT_RADIUS_KM
+if aba == 'Visão Geográfica':
+    st.markdown('# Country Maps')
+    map_mode = st.radio('Modo do mapa', list(MAP_MODES), horizontal=True, key='map_mode')
+    # o mapa é desenhado aqui depois dos cálculos; os controles da grade vêm abaixo dele
+    mapa = st.container()
+
+    st.markdown('# Grade geográfica')
+    grid_label = st.radio('Pontos da grade', list(GRID_POINTS), horizontal=True, key='grid_label',
+                          help='Cada bolha é uma célula de ~11 km: tamanho = pedidos, cor = tempo médio de entrega')
+    grade = st.container()
+
+    st.markdown('# Pedidos por raio')
+    col1, col2 = st.columns(2)
+    with col1:
+        # restaurantes com mais pedidos: rótulo -> (latitude, longitude)
+        restaurantes = {'%.5f, %.5f (%d pedidos)' % (lat, lon, n): (float(lat), float(lon))
+                        for lat, lon, n in load_grid().restaurants.itertuples(index=False)}
+        restaurant = restaurantes[st.selectbox('Restaurante', list(restaurantes), key='restaurante')]
+    with col2:
+        radius_km = st.slider('Raio (km)', min_value=1, max_value=50, value=DEFAULT_RADIUS_KM, key='raio_km')
+
+# os cálculos da aba rodam em paralelo (e passam pelo cache) antes de renderizar
+with stage('compute_widgets/visao_empresa'):
+    grid_points = DEFAULT_GRID_POINTS if grid_label is None else GRID_POINTS[grid_label]
+    resultados = compute_widgets(filtros, widgets(filtros, map_mode, grid_points, restaurant, radius_km, tabs=[aba]))
+
+render = stage('render/visao_empresa').start()
+
+if aba == 'Visão Gerencial':
+    if ao_vivo:
+        with st.container():
+            st.markdown('# Ao vivo')
+            live_panel(traffic_options, graficos_ao_vivo)
+
+    with st.container():
+        # Order Metric
+        st.markdown('# Orders by Day')
+        st.plotly_chart(resultados['order_metric'], use_container_width=True)
+
+    with st.container():
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.header('Traffic Order Share')
+            st.plotly_chart(resultados['traffic_order_share'], use_container_width=True)
+
+        with col2:
+            st.header('Traffic Order City')
+            st.plotly_chart(resultados['traffic_order_city'], use_container_width=True)
+
+elif aba == 'Visão Tática':
+    with st.container():
+        st.markdown('# Order by Week')
+        st.plotly_chart(resultados['order_by_week'], use_container_width=True)
+
+    with st.container():
+        st.markdown('# Order Share by Week')
+        st.plotly_chart(resultados['order_share_by_week'], use_container_width=True)
+
+else:
+    with mapa:
+        components.html(resultados['country_maps/' + map_mode], width=1024, height=610)
+
+    with grade:
+        st.plotly_chart(resultados['grid_map/' + grid_points], use_container_width=True)
+
+    raio = resultados['orders_within/%.6f,%.6f/%g' % (restaurant + (radius_km,))]
+    if raio is None:
+        st.caption('Consulta por raio indisponível no modo out-of-core (dataset processado em lotes)')
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric('Pedidos no raio', raio['orders'])
+        col2.metric('Tempo médio de entrega', raio['avg_time'])
+        col3.metric('Desvio padrão do tempo', raio['std_time'])
+        col4.metric('Distância média', raio['avg_distance'])
+
+render.stop()
+pagina.stop()
+debug_panel()
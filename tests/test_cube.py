@@ -0,0 +1,55 @@
+""" Testes do cubo diário: cube_stats deve bater com o groupby do pandas nas linhas
+
+    Uso (a partir da raiz do repositório):
+        python -m pytest tests
+"""
+# bibliotecas
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_orders
+from curry.cleaning import prepare
+from curry.cube import build_cube, cube_stats, filter_cube
+
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+
+# filtros estreitos (um dia, uma semana só com Jam) e o dataset inteiro
+FILTERS = [
+    ('2022-03-01', '2022-03-02', TRAFFIC),
+    ('2022-03-01', '2022-03-08', ['Jam']),
+    ('2022-02-11', '2022-02-12', ['Low', 'High']),
+    (None, '2022-07-01', TRAFFIC),
+]
+
+@pytest.fixture(scope='module')
+def df1():
+    return prepare(make_orders(50_000, seed=1))
+
+@pytest.fixture(scope='module')
+def cube(df1):
+    return build_cube(df1)
+
+def _rows(df1, start, end, traffic_options):
+    linhas = (df1['Order_Date'] < pd.Timestamp(end)) & df1['Road_traffic_density'].isin(traffic_options)
+    if start is not None:
+        linhas &= df1['Order_Date'] >= pd.Timestamp(start)
+    return df1.loc[linhas, :]
+
+@pytest.mark.parametrize('start, end, traffic_options', FILTERS)
+@pytest.mark.parametrize('by', ['Festival', 'City', None])
+@pytest.mark.parametrize('measure', ['Time_taken(min)', 'distance', 'Delivery_person_Ratings'])
+def test_cube_stats_matches_pandas(df1, cube, start, end, traffic_options, by, measure):
+    got = cube_stats(filter_cube(cube, start and pd.Timestamp(start), pd.Timestamp(end), traffic_options), by, measure)
+    rows = _rows(df1, start, end, traffic_options)[measure].astype(np.float64)
+    if by is None:
+        expected = pd.DataFrame({'count': [rows.size], 'mean': [rows.mean()], 'std': [rows.std()]})
+    else:
+        groups = _rows(df1, start, end, traffic_options)[by]
+        expected = rows.groupby(groups, observed=True).agg(['size', 'mean', 'std']).rename(columns={'size': 'count'})
+        expected = expected.reset_index()
+        got = got.sort_values(by, ignore_index=True)
+        assert got[by].astype(str).tolist() == expected[by].astype(str).tolist()
+    assert got['count'].tolist() == expected['count'].tolist()
+    np.testing.assert_allclose(got['mean'], expected['mean'], rtol=1e-6)
+    np.testing.assert_allclose(got['std'], expected['std'], rtol=1e-6)
@@ -0,0 +1,64 @@
+""" Testes dos acumulados por dia: os totais do período devem bater com o cubo filtrado
+
+    Uso (a partir da raiz do repositório):
+        python -m pytest tests
+"""
+# bibliotecas
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_orders
+from curry.cleaning import prepare
+from curry.cube import build_cube, cube_stats, filter_cube
+from curry.dateindex import DayTotals
+
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+
+# filtros estreitos, um período sem pedidos e o dataset inteiro
+FILTERS = [
+    ('2022-03-01', '2022-03-02', TRAFFIC),
+    ('2022-03-01', '2022-03-08', ['Jam']),
+    ('2022-02-11', '2022-02-12', ['Low', 'High']),
+    ('2030-01-01', '2030-02-01', TRAFFIC),
+    (None, '2022-07-01', TRAFFIC),
+]
+
+@pytest.fixture(scope='module')
+def cube():
+    return build_cube(prepare(make_orders(50_000, seed=2)))
+
+@pytest.fixture(scope='module')
+def totals(cube):
+    return DayTotals(cube)
+
+def _window(start, end):
+    return start and pd.Timestamp(start), pd.Timestamp(end)
+
+@pytest.mark.parametrize('start, end, traffic_options', FILTERS)
+@pytest.mark.parametrize('by', ['Festival', ['City', 'Road_traffic_density'], None])
+def test_between_matches_filtered_cube(cube, totals, start, end, traffic_options, by):
+    start, end = _window(start, end)
+    got = cube_stats(totals.between(start, end, traffic_options), by, 'Time_taken(min)')
+    expected = cube_stats(filter_cube(cube, start, end, traffic_options), by, 'Time_taken(min)')
+    if by is not None:
+        got = got.sort_values(by, ignore_index=True)
+        expected = expected.sort_values(by, ignore_index=True)
+    assert got['count'].tolist() == expected['count'].tolist()
+    np.testing.assert_allclose(got['mean'], expected['mean'], rtol=1e-9)
+    np.testing.assert_allclose(got['std'], expected['std'], rtol=1e-6)
+
+@pytest.mark.parametrize('start, end, traffic_options', FILTERS)
+def test_range_queries(cube, totals, start, end, traffic_options):
+    start, end = _window(start, end)
+    filtered = filter_cube(cube, start, end, traffic_options)
+    orders = int(filtered['count'].sum())
+    assert totals.orders_between(start, end, traffic_options) == orders
+    assert totals.sum_between('distance', start, end, traffic_options) == pytest.approx(filtered['distance_sum'].sum())
+    mean = totals.mean_between('distance', start, end, traffic_options)
+    assert mean is None if not orders else mean == pytest.approx(filtered['distance_sum'].sum() / orders)
+    if start is None:
+        assert totals.orders_until(end, traffic_options) == orders
+
+def test_bounds(cube, totals):
+    assert totals.bounds() == (cube['Order_Date'].iloc[0].to_pydatetime(), cube['Order_Date'].iloc[-1].to_pydatetime())
@@ -0,0 +1,44 @@
+""" Testes do motor de métricas: no cubo (pelas somas) e nas linhas o resultado deve ser o mesmo
+
+    Uso (a partir da raiz do repositório):
+        python -m pytest tests
+"""
+# bibliotecas
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_orders
+from curry.cleaning import prepare
+from curry.cube import build_cube, filter_cube
+from curry.metrics import compute_metrics
+from curry.restaurantes import OVERALL_METRICS
+
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+
+# um dia, uma semana só com Jam, um período sem pedidos e o dataset inteiro
+FILTERS = [
+    ('2022-03-01', '2022-03-02', TRAFFIC),
+    ('2022-03-01', '2022-03-08', ['Jam']),
+    ('2030-01-01', '2030-02-01', TRAFFIC),
+    (None, '2022-07-01', TRAFFIC),
+]
+
+@pytest.fixture(scope='module')
+def df1():
+    return prepare(make_orders(50_000, seed=3))
+
+@pytest.fixture(scope='module')
+def cube(df1):
+    return build_cube(df1)
+
+@pytest.mark.parametrize('start, end, traffic_options', FILTERS)
+def test_cube_metrics_match_rows(df1, cube, start, end, traffic_options):
+    start, end = start and pd.Timestamp(start), pd.Timestamp(end)
+    linhas = (df1['Order_Date'] < end) & df1['Road_traffic_density'].isin(traffic_options)
+    if start is not None:
+        linhas &= df1['Order_Date'] >= start
+    expected = compute_metrics(df1.loc[linhas, :], OVERALL_METRICS, decimals=6)
+    got = compute_metrics(filter_cube(cube, start, end, traffic_options), OVERALL_METRICS, decimals=6)
+    assert got.keys() == expected.keys()
+    for name, value in expected.items():
+        assert got[name] == (None if value is None else pytest.approx(value, rel=1e-6)), name